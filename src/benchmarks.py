@@ -0,0 +1,513 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+from feature_kernels import rollingMeanStd
+from feature_online import OnlineFeatures
+from feature_registry import evaluateFeatures, extraFeatureNames, featureNames
+from features import (
+    buildFeatureMatrix,
+    buildFeatureMatrixBatch,
+    computeFeatures,
+    iterFeatureChunks,
+    writeFeatureChunks,
+)
+from feature_store import TARGET, featureColumns, readFeatureMatrix, writeFeatureStore
+from modeling import fitRidge, splitIndex
+from store_sqlite import BACKENDS, bulkLoadSeries, connectDb, readObservations, readSeriesWindow, upsertSeries
+
+
+def syntheticSeries(n_series: int, n_rows: int, seed: int = 0, freq: str = "D") -> list[tuple[str, pd.DataFrame]]:
+    """
+    Generate random-walk price series for benchmarking (daily unless `freq`
+    says otherwise, e.g. "min" for intraday bars).
+
+    Returns
+    -------
+    list[tuple[str, pd.DataFrame]]
+        (series_id, DataFrame with ["date", "value"]) pairs.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1990-01-01", periods=n_rows, freq=freq)
+    frames = []
+    for i in range(n_series):
+        values = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n_rows)))
+        frames.append((f"SYN{i:05d}", pd.DataFrame({"date": dates, "value": values})))
+    return frames
+
+
+def timeIt(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def benchmarkSqliteLoad(n_series: int, n_rows: int) -> pd.DataFrame:
+    """
+    Compare the pandas `to_sql` (SQLAlchemy) load path with store_sqlite.bulkLoadSeries
+    on the same synthetic data, each into a fresh database.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per method with seconds and rows/s.
+    """
+    frames = syntheticSeries(n_series, n_rows)
+    total = n_series * n_rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def loadToSql() -> None:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'to_sql.db')}")
+            for series_id, df in frames:
+                df.assign(series_id=series_id).to_sql("observations", engine, if_exists="append", index=False)
+            engine.dispose()
+
+        def loadBulk() -> None:
+            bulkLoadSeries(frames, os.path.join(tmp, "bulk.db"), "observations")
+
+        results = [("to_sql", timeIt(loadToSql)), ("bulkLoadSeries", timeIt(loadBulk))]
+
+    out = pd.DataFrame(results, columns=["method", "seconds"])
+    out["rows"] = total
+    out["rows_per_s"] = total / out["seconds"]
+    return out
+
+
+def benchmarkBackends(n_series: int, n_rows: int, backends: tuple[str, ...] = BACKENDS) -> pd.DataFrame:
+    """
+    Compare storage backends on the same synthetic data: bulk load, a
+    full-table aggregation per series, a date slice across all series, and a
+    one-series window read (the features access path).
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per (backend, operation) with seconds.
+    """
+    frames = syntheticSeries(n_series, n_rows)
+    dates = frames[0][1]["date"]
+    slice_start, slice_end = dates.iloc[n_rows // 2], dates.iloc[n_rows // 2 + 30]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            db_path = os.path.join(tmp, f"bench.{backend}")
+
+            def aggregate() -> None:
+                conn = connectDb(db_path, backend)
+                conn.execute(
+                    'SELECT series_id, COUNT(*), AVG(value), MIN(value), MAX(value) FROM "observations" '
+                    "GROUP BY series_id"
+                ).fetchall()
+                conn.close()
+
+            operations = [
+                ("load", lambda: bulkLoadSeries(frames, db_path, "observations", backend=backend)),
+                ("aggregate", aggregate),
+                (
+                    "date_slice",
+                    lambda: readObservations(db_path, "observations", start=slice_start, end=slice_end, backend=backend),
+                ),
+                ("series_window", lambda: readSeriesWindow(db_path, "observations", frames[-1][0], backend=backend)),
+            ]
+            results.extend((backend, op, timeIt(fn)) for op, fn in operations)
+
+    return pd.DataFrame(results, columns=["backend", "operation", "seconds"])
+
+
+def benchmarkFeatureIo(n_rows: int, n_features: int) -> pd.DataFrame:
+    """
+    Compare writing and loading a feature matrix as CSV with the binary
+    feature store (memory-mapped .npy), including whether the round trip is
+    bit-exact.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per format with write/read seconds and exactness.
+    """
+    rng = np.random.default_rng(0)
+    feat = pd.DataFrame(rng.normal(0.0, 0.01, (n_rows, n_features)), columns=[f"f_{i}" for i in range(n_features)])
+    feat.insert(0, "date", pd.date_range("1990-01-01", periods=n_rows, freq="D"))
+    feat["y_next_return"] = rng.normal(0.0, 0.01, n_rows)
+    X_ref = feat.iloc[:, 1:-1].to_numpy()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, path in (("csv", os.path.join(tmp, "features.csv")), ("store", os.path.join(tmp, "features"))):
+            if fmt == "csv":
+                write_s = timeIt(lambda: feat.to_csv(path, index=False))
+            else:
+                write_s = timeIt(lambda: writeFeatureStore(feat, path))
+            loaded = {}
+            read_s = timeIt(lambda: loaded.update(X=readFeatureMatrix(path)[1]))
+            results.append((fmt, write_s, read_s, bool(np.array_equal(loaded["X"], X_ref))))
+
+    return pd.DataFrame(results, columns=["format", "write_s", "read_s", "exact"])
+
+
+def benchmarkRolling(n_rows: int, n_windows: int, repeats: int = 3) -> pd.DataFrame:
+    """
+    Compare per-window pandas `rolling().mean()/.std()` with the single-pass
+    feature_kernels.rollingMeanStd on a synthetic return series (best of
+    `repeats` runs), including the largest absolute difference.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per method with seconds and max_abs_diff vs. pandas.
+    """
+    returns = np.random.default_rng(0).normal(0.0, 0.01, n_rows)
+    returns[0] = np.nan
+    windows = list(range(2, 2 * n_windows + 1, 2))
+    series = pd.Series(returns)
+
+    def pandasRolling() -> np.ndarray:
+        columns = []
+        for w in windows:
+            columns.append(series.rolling(window=w).mean().to_numpy())
+            columns.append(series.rolling(window=w).std().to_numpy())
+        return np.column_stack(columns)
+
+    results = {}
+    for method, fn in (("pandas", pandasRolling), ("rollingMeanStd", lambda: rollingMeanStd(returns, windows))):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results[method] = fn()
+            best = min(best, time.perf_counter() - start)
+        results[f"{method}_s"] = best
+
+    diff = float(np.nanmax(np.abs(results["rollingMeanStd"] - results["pandas"])))
+    return pd.DataFrame(
+        [("pandas", results["pandas_s"], 0.0), ("rollingMeanStd", results["rollingMeanStd_s"], diff)],
+        columns=["method", "seconds", "max_abs_diff"],
+    )
+
+
+def benchmarkBatchFeatures(
+    n_series: int, n_rows: int, lags: list[int] = [1, 3, 6, 12], windows: list[int] = [3, 6, 12]
+) -> pd.DataFrame:
+    """
+    Compare a per-series loop over buildFeatureMatrix with buildFeatureMatrixBatch
+    on one long-format frame of synthetic series.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per method with seconds and output rows.
+    """
+    long_df = pd.concat([df.assign(series_id=sid) for sid, df in syntheticSeries(n_series, n_rows)], ignore_index=True)
+    out = {}
+
+    def perSeries() -> None:
+        parts = [
+            buildFeatureMatrix(group.drop(columns="series_id"), lags, windows).assign(series_id=sid)
+            for sid, group in long_df.groupby("series_id", sort=True)
+        ]
+        out["loop"] = pd.concat(parts, ignore_index=True)
+
+    def batched() -> None:
+        out["batch"] = buildFeatureMatrixBatch(long_df, lags, windows)
+
+    results = [("per-series loop", timeIt(perSeries)), ("buildFeatureMatrixBatch", timeIt(batched))]
+    return pd.DataFrame(
+        [(method, seconds, len(out[key])) for (method, seconds), key in zip(results, ("loop", "batch"))],
+        columns=["method", "seconds", "rows"],
+    )
+
+
+def benchmarkCompact(
+    n_series: int,
+    n_rows: int,
+    max_drift: float = 1e-3,
+    lags: list[int] = [1, 3, 6, 12],
+    windows: list[int] = [3, 6, 12],
+) -> pd.DataFrame:
+    """
+    Compare the default float64 feature frame with compact (float32) mode on
+    a synthetic panel: build time, frame memory, peak traced allocation while
+    building, and the Ridge metrics on the last 20% of rows.
+
+    Raises
+    ------
+    ValueError
+        If compact mode moves MAE or RMSE by more than `max_drift` (relative).
+    """
+    long_df = pd.concat([df.assign(series_id=sid) for sid, df in syntheticSeries(n_series, n_rows)], ignore_index=True)
+    results = []
+    for mode, compact in (("float64", False), ("float32 compact", True)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        feat = buildFeatureMatrixBatch(long_df, lags, windows, compact=compact)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        X = feat[featureColumns(feat.columns)].to_numpy()
+        y = feat[TARGET].to_numpy()
+        n_train = splitIndex(len(y), 0.2)
+        _, _, mae, rmse = fitRidge(X[:n_train], y[:n_train], X[n_train:], y[n_train:])
+        frame_mb = feat.memory_usage(index=False).sum() / 2**20
+        results.append((mode, seconds, frame_mb, peak / 2**20, mae, rmse))
+        del feat, X, y
+
+    out = pd.DataFrame(results, columns=["mode", "seconds", "frame_mb", "peak_mb", "mae", "rmse"])
+    drift = float((out[["mae", "rmse"]].iloc[1] / out[["mae", "rmse"]].iloc[0] - 1.0).abs().max())
+    out["metric_drift"] = [0.0, drift]
+    if drift > max_drift:
+        raise ValueError(f"Compact mode drifts the metrics by {drift:.3g}; tolerance is {max_drift:g}")
+    return out
+
+
+def benchmarkAssembly(
+    n_series: int, n_rows: int, lags: list[int] = [1, 3, 6, 12], windows: list[int] = [3, 6, 12]
+) -> pd.DataFrame:
+    """
+    Compare the preallocated feature block of buildFeatureMatrix(Batch) with
+    assembling a frame column by column and dropping incomplete rows with
+    dropna (the previous implementation), for one long series and for a
+    panel: time, size of the result and peak traced allocation while
+    building it.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per case and method.
+    """
+    series = syntheticSeries(n_series, n_rows)
+    single = pd.concat([df for _, df in series], ignore_index=True)
+    single["date"] = pd.date_range("1990-01-01", periods=len(single), freq="min")
+    panel = pd.concat([df.assign(series_id=sid) for sid, df in series], ignore_index=True)
+    cases = {"single series": (single, buildFeatureMatrix), "panel": (panel, buildFeatureMatrixBatch)}
+
+    def columnFrame(df: pd.DataFrame, lags: list[int], windows: list[int]) -> pd.DataFrame:
+        single_series = "series_id" not in df.columns
+        df = df.assign(series_id="") if single_series else df
+        df = df.sort_values(["series_id", "date"], kind="stable")
+        df = df[df["value"] > 0].reset_index(drop=True)
+        codes = pd.factorize(df["series_id"])[0]
+        starts = np.ones(len(df), dtype=bool)
+        starts[1:] = codes[1:] != codes[:-1]
+        sources = {"value": df["value"].to_numpy(dtype=np.float64), "starts": starts}
+        columns = pd.DataFrame(evaluateFeatures(sources, featureNames(lags, windows)), index=df.index)
+        feat = pd.concat([df, columns], axis=1).dropna().reset_index(drop=True)
+        return feat.drop(columns="series_id") if single_series else feat
+
+    rows = []
+    for case, (df, build) in cases.items():
+        for method, fn in (("columns + dropna", columnFrame), ("preallocated block", build)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            feat = fn(df, lags, windows)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            frame_mb = feat.memory_usage(index=False).sum() / 2**20
+            rows.append((case, method, len(feat), seconds, frame_mb, peak / 2**20))
+            del feat
+    return pd.DataFrame(rows, columns=["case", "method", "rows", "seconds", "frame_mb", "peak_mb"])
+
+
+def benchmarkStreaming(
+    n_rows: int,
+    chunk_rows: int,
+    lags: list[int] = [1, 3, 6, 12],
+    windows: list[int] = [3, 6, 12],
+) -> pd.DataFrame:
+    """
+    Compare an in-memory full build (computeFeatures + writeFeatureStore)
+    with the chunked streaming engine on one long synthetic series stored in
+    SQLite (minute bars): seconds and peak traced allocation of each.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per method with seconds, peak MB and rows written.
+    """
+    _, df = syntheticSeries(1, n_rows, freq="min")[0]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "stream.db")
+        upsertSeries(df, db_path, "observations", "SYN00000")
+        del df
+
+        def full() -> int:
+            feat = computeFeatures(db_path, "observations", "SYN00000", lags, windows)
+            writeFeatureStore(feat, os.path.join(tmp, "full"))
+            return len(feat)
+
+        def streamed() -> int:
+            chunks = iterFeatureChunks(db_path, "observations", "SYN00000", lags, windows, chunk_rows=chunk_rows)
+            return writeFeatureChunks(chunks, os.path.join(tmp, "streamed"))
+
+        for method, fn in (("in-memory", full), (f"chunks of {chunk_rows:,}", streamed)):
+            tracemalloc.start()
+            start = time.perf_counter()
+            n_out = fn()
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append((method, seconds, peak / 2**20, n_out))
+
+    return pd.DataFrame(results, columns=["method", "seconds", "peak_mb", "rows"])
+
+
+def benchmarkFamilies(n_series: int, n_rows: int, param: int = 12) -> pd.DataFrame:
+    """
+    Time each extra feature family (EWMA, rolling skewness/kurtosis,
+    min/max, z-score; half-life or window `param`) built by
+    buildFeatureMatrixBatch against the pandas groupby equivalent on a
+    synthetic panel, and check they agree.
+
+    The pandas side gets the log returns precomputed; the pipeline side
+    includes reading the prices and computing them.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per family with seconds for both and the largest absolute
+        difference.
+    """
+    panel = pd.concat([df.assign(series_id=sid) for sid, df in syntheticSeries(n_series, n_rows)], ignore_index=True)
+    returns = np.log(panel["value"]).groupby(panel["series_id"]).diff().groupby(panel["series_id"])
+
+    def rolling(stat: str):
+        return lambda: returns.transform(lambda s: getattr(s.rolling(param), stat)())
+
+    def ewm(stat: str):
+        return lambda: returns.transform(lambda s: getattr(s.ewm(halflife=param, min_periods=param), stat)())
+
+    def zscore():
+        mean = returns.transform(lambda s: s.rolling(param).mean())
+        std = returns.transform(lambda s: s.rolling(param).std())
+        return (returns.obj - mean) / std
+
+    families = {
+        "ewm_halflives": {"r_ewm_mean": ewm("mean"), "r_ewm_vol": ewm("std")},
+        "moment_windows": {"r_roll_skew": rolling("skew"), "r_roll_kurt": rolling("kurt")},
+        "minmax_windows": {"r_roll_min": rolling("min"), "r_roll_max": rolling("max")},
+        "zscore_windows": {"r_zscore": zscore},
+    }
+    buildFeatureMatrixBatch(panel, [], [])  # warm up pandas/pyarrow code paths before timing
+    rows = []
+    for key, references in families.items():
+        out = {}
+        names = extraFeatureNames(**{key: [param]})
+        pipeline_s = timeIt(lambda: out.update(feat=buildFeatureMatrixBatch(panel, [], [], extra=names)))
+        pandas_s = timeIt(lambda: out.update({prefix: fn() for prefix, fn in references.items()}))
+        feat = out["feat"].set_index(["series_id", "date"])
+        index = pd.MultiIndex.from_frame(panel[["series_id", "date"]])
+        max_diff = max(
+            float(np.max(np.abs(feat[f"{prefix}_{param}"].to_numpy() - out[prefix].set_axis(index).loc[feat.index])))
+            for prefix in references
+        )
+        rows.append((key, pipeline_s, pandas_s, max_diff))
+    return pd.DataFrame(rows, columns=["family", "pipeline_seconds", "pandas_seconds", "max_abs_diff"])
+
+
+def benchmarkOnline(
+    n_rows: int, lags: list[int] = [1, 3, 6, 12], windows: list[int] = [3, 6, 12], extra: list[str] = ()
+) -> pd.DataFrame:
+    """
+    Feed a synthetic series price by price through OnlineFeatures, check
+    every complete vector against the matching buildFeatureMatrix row, and
+    time one update and one linear-model score.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per operation with microseconds per call, plus the largest
+        difference from the batch features.
+    """
+    _, df = syntheticSeries(1, n_rows, freq="min")[0]
+    batch = buildFeatureMatrix(df, lags, windows, extra=extra).set_index("date")
+    state = OnlineFeatures(lags, windows, extra)
+    batch = batch[state.columns]
+    values = df["value"].to_numpy(dtype=np.float64).tolist()
+
+    vectors = np.full((n_rows, len(state.columns)), np.nan)
+    for i, value in enumerate(values):
+        if state.update(value):
+            vectors[i] = state.features()
+    online = pd.DataFrame(vectors, index=df["date"], columns=state.columns).loc[batch.index]
+    max_diff = float(np.max(np.abs(online.to_numpy() - batch.to_numpy())))
+
+    timed = OnlineFeatures(lags, windows, extra)
+    update_s = timeIt(lambda: [timed.update(value) for value in values]) / n_rows
+    coef = [0.01] * len(state.columns)
+    score_s = timeIt(lambda: [timed.score(coef, 0.0) for _ in range(n_rows)]) / n_rows
+    return pd.DataFrame(
+        [("update", update_s * 1e6, max_diff), ("score", score_s * 1e6, 0.0)],
+        columns=["operation", "us_per_call", "max_abs_diff"],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+    load = sub.add_parser("sqlite-load", help="to_sql vs bulk loader throughput")
+    load.add_argument("--n-series", type=int, default=200)
+    load.add_argument("--n-rows", type=int, default=5_000)
+    backends = sub.add_parser("backends", help="SQLite vs DuckDB load and query times")
+    backends.add_argument("--n-series", type=int, default=200)
+    backends.add_argument("--n-rows", type=int, default=5_000)
+    backends.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated, e.g. sqlite,duckdb")
+    feature_io = sub.add_parser("feature-io", help="Features CSV vs binary feature store")
+    feature_io.add_argument("--n-rows", type=int, default=200_000)
+    feature_io.add_argument("--n-features", type=int, default=20)
+    rolling = sub.add_parser("rolling", help="pandas rolling vs single-pass multi-window kernel")
+    rolling.add_argument("--n-rows", type=int, default=20_000)
+    rolling.add_argument("--n-windows", type=int, default=50)
+    batch = sub.add_parser("batch-features", help="Per-series feature loop vs one batched pass")
+    batch.add_argument("--n-series", type=int, default=5_000)
+    batch.add_argument("--n-rows", type=int, default=240)
+    compact = sub.add_parser("compact", help="float64 vs compact float32 feature matrix: memory and metric drift")
+    compact.add_argument("--n-series", type=int, default=2_000)
+    compact.add_argument("--n-rows", type=int, default=240)
+    compact.add_argument("--max-drift", type=float, default=1e-3)
+    assembly = sub.add_parser("assembly", help="Column-by-column frame + dropna vs preallocated feature block")
+    assembly.add_argument("--n-series", type=int, default=2_000)
+    assembly.add_argument("--n-rows", type=int, default=240)
+    streaming = sub.add_parser("streaming", help="In-memory vs chunked streaming feature build: peak memory")
+    streaming.add_argument("--n-rows", type=int, default=2_000_000)
+    streaming.add_argument("--chunk-rows", type=int, default=100_000)
+    online = sub.add_parser("online", help="O(1) online feature updates vs batch features")
+    online.add_argument("--n-rows", type=int, default=200_000)
+    online.add_argument("--families", action="store_true", help="Include every extra feature family (window 12)")
+    families = sub.add_parser("families", help="Extra feature families vs pandas rolling/ewm equivalents")
+    families.add_argument("--n-series", type=int, default=500)
+    families.add_argument("--n-rows", type=int, default=1_000)
+    families.add_argument("--param", type=int, default=12, help="Half-life / window of every family")
+    args = parser.parse_args()
+
+    if args.benchmark == "sqlite-load":
+        print(benchmarkSqliteLoad(args.n_series, args.n_rows).to_string(index=False))
+    elif args.benchmark == "backends":
+        names = tuple(x.strip() for x in args.backends.split(",") if x.strip())
+        print(benchmarkBackends(args.n_series, args.n_rows, names).to_string(index=False))
+    elif args.benchmark == "feature-io":
+        print(benchmarkFeatureIo(args.n_rows, args.n_features).to_string(index=False))
+    elif args.benchmark == "rolling":
+        print(benchmarkRolling(args.n_rows, args.n_windows).to_string(index=False))
+    elif args.benchmark == "batch-features":
+        print(benchmarkBatchFeatures(args.n_series, args.n_rows).to_string(index=False))
+    elif args.benchmark == "compact":
+        print(benchmarkCompact(args.n_series, args.n_rows, args.max_drift).to_string(index=False))
+    elif args.benchmark == "assembly":
+        print(benchmarkAssembly(args.n_series, args.n_rows).to_string(index=False))
+    elif args.benchmark == "streaming":
+        print(benchmarkStreaming(args.n_rows, args.chunk_rows).to_string(index=False))
+    elif args.benchmark == "online":
+        extra = extraFeatureNames([12], [12], [12], [12]) if args.families else ()
+        print(benchmarkOnline(args.n_rows, extra=extra).to_string(index=False))
+    elif args.benchmark == "families":
+        print(benchmarkFamilies(args.n_series, args.n_rows, args.param).to_string(index=False))
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+
+from feature_store import copyFeatureStore
+
+FEATURE_CACHE_MAX_BYTES = 1 << 30
+FEATURE_CODE_MODULES = ("features.py", "feature_kernels.py", "feature_registry.py", "feature_store.py")
+
+
+def featureCodeVersion() -> str:
+    """
+    Fingerprint of the feature code: a hash of the modules that compute and
+    store feature matrices, so cached matrices are not reused after the
+    feature definitions change.
+    """
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in FEATURE_CODE_MODULES:
+        with open(os.path.join(src_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def featureCacheKey(
+    content_hash: str,
+    series_id: str,
+    lags: list[int],
+    windows: list[int],
+    dtype: str = "float64",
+    extra: list[str] = (),
+) -> str:
+    """
+    Cache key of a feature matrix: the series' content hash (see
+    store_sqlite.seriesContentHash), the sorted lags, windows and extra
+    features, the store dtype and the feature code version.
+    """
+    spec = {
+        "content_hash": content_hash,
+        "series_id": series_id,
+        "lags": sorted(lags),
+        "windows": sorted(windows),
+        "extra": sorted(extra),
+        "dtype": dtype,
+        "code_version": featureCodeVersion(),
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+def lookupFeatureCache(cache_dir: str, key: str) -> str | None:
+    """
+    Return the cached feature store for a key, or None on a miss.
+
+    A hit refreshes the entry's mtime, which orders the LRU eviction.
+    """
+    path = os.path.join(cache_dir, key)
+    if not os.path.isfile(os.path.join(path, "meta.json")):
+        return None
+    os.utime(path)
+    return path
+
+
+def storeFeatureCache(cache_dir: str, key: str, store_path: str, max_bytes: int = FEATURE_CACHE_MAX_BYTES) -> None:
+    """
+    Copy a written feature store into the cache and evict least recently
+    used entries until the cache fits in `max_bytes`.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    copyFeatureStore(store_path, os.path.join(cache_dir, key))
+    evictFeatureCache(cache_dir, max_bytes, keep=key)
+
+
+def evictFeatureCache(cache_dir: str, max_bytes: int, keep: str | None = None) -> int:
+    """
+    Remove least recently used cache entries until their total size is at
+    most `max_bytes`. The entry `keep` (the one just written) is never removed.
+
+    Returns
+    -------
+    int
+        Number of entries removed.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if not os.path.isdir(path) or name.endswith((".tmp", ".old")):
+            continue
+        size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+        entries.append((os.path.getmtime(path), name, size))
+
+    total = sum(size for _, _, size in entries)
+    removed = 0
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        shutil.rmtree(os.path.join(cache_dir, name), ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def blockPrefixSums(z: np.ndarray, block: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Prefix sums of z that restart at every multiple of `block`.
+
+    Returns
+    -------
+    (inclusive, exclusive, block_total)
+        Per-row inclusive and exclusive prefix sums within the row's block,
+        and the total of the row's block.
+    """
+    n = len(z)
+    n_blocks = -(-n // block)
+    padded = np.zeros(n_blocks * block)
+    padded[:n] = z
+    inclusive = np.cumsum(padded.reshape(n_blocks, block), axis=1)
+    block_total = np.repeat(inclusive[:, -1], block)[:n]
+    inclusive = inclusive.reshape(-1)[:n]
+    return inclusive, inclusive - z, block_total
+
+
+def segmentPositions(starts: np.ndarray) -> np.ndarray:
+    """
+    Position of every row within its segment, given a boolean array that
+    marks the first row of each segment (e.g., of each series in long data).
+    """
+    rows = np.arange(len(starts))
+    return rows - np.maximum.accumulate(np.where(starts, rows, 0))
+
+
+def lagWithin(x: np.ndarray, lag: int, positions: np.ndarray) -> np.ndarray:
+    """
+    Shift x down by `lag` rows without crossing segment boundaries: rows
+    fewer than `lag` positions into their segment get NaN.
+    """
+    out = np.full(len(x), np.nan)
+    if lag < len(x):
+        out[lag:] = x[: len(x) - lag]
+    out[positions < lag] = np.nan
+    return out
+
+
+def rollingMeanStd(
+    x: np.ndarray, windows: list[int], ddof: int = 1, positions: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Rolling mean and standard deviation for many window sizes in one pass.
+
+    Prefix sums of the values, their squares and a NaN count are built once;
+    each window's sums are then differences of prefix sums, taken as
+    contiguous slices for every window size. Two corrections keep
+    `sum(x^2) - sum(x)^2 / w` accurate on long series:
+
+    - the values are shifted by their mean before summing (the shifted-data
+      variance algorithm), so the squares do not carry the level;
+    - prefix sums restart every `max(windows)` rows (a window then spans at
+      most two blocks), so rounding error is bounded by the largest window
+      instead of growing with the length of the series.
+
+    Tiny negative variances left by rounding are clamped to zero.
+
+    Parameters
+    ----------
+    x:
+        1-D array of values (e.g., log returns); NaNs are allowed.
+    windows:
+        Window sizes, in output order.
+    ddof:
+        Delta degrees of freedom for the standard deviation (1 matches
+        pandas `rolling().std()`).
+    positions:
+        Optional position of each row within its segment (see
+        segmentPositions) when x holds several series back to back; windows
+        that would reach into the previous segment are NaN.
+
+    Returns
+    -------
+    np.ndarray
+        C-contiguous float64 array of shape (len(x), 2 * len(windows)) with
+        columns [mean_w0, std_w0, mean_w1, std_w1, ...]. Like pandas with the
+        default min_periods, a row is NaN until a full window is available and
+        whenever its window contains a NaN.
+    """
+    return np.ascontiguousarray(rollingMeanStdRows(x, windows, ddof=ddof, positions=positions).T)
+
+
+def rollingMeanStdRows(
+    x: np.ndarray, windows: list[int], ddof: int = 1, positions: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    rollingMeanStd with one contiguous row per statistic: an array of shape
+    (2 * len(windows), len(x)) with rows [mean_w0, std_w0, ...]. Each row can
+    be used as a column without the copy a transpose would need.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    stats = np.full((2 * len(windows), n), np.nan)
+    if n == 0 or len(windows) == 0:
+        return stats
+
+    missing = np.isnan(x)
+    shift = float(np.mean(x[~missing])) if not missing.all() else 0.0
+    z = np.where(missing, 0.0, x - shift)
+    block = max(max(windows), 1)
+    c1, e1, t1 = blockPrefixSums(z, block)
+    c2, e2, t2 = blockPrefixSums(z * z, block)
+    del z
+    nan_count = np.concatenate([[0], np.cumsum(missing)])
+    row_block = np.arange(n) // block
+
+    # Window sums are written into reused buffers (and the statistics straight
+    # into their rows of `stats`) to keep the peak memory of long inputs low.
+    sum1_buf = np.empty(n)
+    sum2_buf = np.empty(n)
+    for i, w in enumerate(windows):
+        if w > n:
+            continue
+        m = n - w + 1  # windows end at rows w-1..n-1 and start at rows 0..n-w
+        cross = row_block[:m] != row_block[w - 1 :]
+        sum1 = np.subtract(c1[w - 1 :], e1[:m], out=sum1_buf[:m])
+        np.add(sum1, t1[:m], out=sum1, where=cross)
+        sum2 = np.subtract(c2[w - 1 :], e2[:m], out=sum2_buf[:m])
+        np.add(sum2, t2[:m], out=sum2, where=cross)
+        incomplete = nan_count[w:] != nan_count[:m]
+        if positions is not None:
+            incomplete |= positions[w - 1 :] < w - 1
+
+        mean = np.divide(sum1, w, out=stats[2 * i, w - 1 :])
+        if w > ddof:
+            std = stats[2 * i + 1, w - 1 :]
+            np.multiply(sum1, mean, out=sum1)
+            np.subtract(sum2, sum1, out=sum2)
+            np.maximum(sum2, 0.0, out=sum2)
+            np.divide(sum2, w - ddof, out=sum2)
+            np.sqrt(sum2, out=std)
+            std[incomplete] = np.nan
+        mean += shift
+        mean[incomplete] = np.nan
+    return stats
+
+
+def incompleteWindows(missing: np.ndarray, w: int, positions: np.ndarray | None = None) -> np.ndarray:
+    """
+    For every window of w rows ending at rows w-1..n-1, whether it contains
+    a NaN or reaches into the previous segment.
+    """
+    nan_count = np.concatenate([[0], np.cumsum(missing)])
+    incomplete = nan_count[w:] != nan_count[: len(missing) - w + 1]
+    if positions is not None:
+        incomplete |= positions[w - 1 :] < w - 1
+    return incomplete
+
+
+# Rows per chunk of rollingSkewKurtRows: its scratch arrays stay small enough
+# to be reused from chunk to chunk instead of freshly paged in.
+MOMENT_CHUNK_ROWS = 1 << 15
+
+
+def rollingSkewKurtRows(x: np.ndarray, windows: list[int], positions: np.ndarray | None = None) -> np.ndarray:
+    """
+    Rolling sample skewness and excess kurtosis for many window sizes in one
+    pass, with the bias corrections of pandas `rolling().skew()/.kurt()`.
+
+    Block-local prefix sums of the first four powers of the mean-shifted
+    values are computed once and shared by every window (as in
+    rollingMeanStdRows); their differences give each window's central
+    moments m2, m3, m4. Skewness needs w >= 3 and kurtosis w >= 4; windows
+    with (numerically) zero variance, NaNs or a segment boundary are NaN.
+    Long inputs are processed MOMENT_CHUNK_ROWS output rows at a time, each
+    chunk reading the max(windows) - 1 rows before it.
+
+    Returns
+    -------
+    np.ndarray
+        Shape (2 * len(windows), len(x)): rows [skew_w0, kurt_w0, ...].
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = np.full((2 * len(windows), n), np.nan)
+    if n == 0 or len(windows) == 0:
+        return out
+
+    missing = np.isnan(x)
+    shift = float(np.mean(x[~missing])) if not missing.all() else 0.0
+    span = max(windows) - 1
+    for lo in range(0, n, MOMENT_CHUNK_ROWS):
+        hi = min(lo + MOMENT_CHUNK_ROWS, n)
+        start = max(lo - span, 0)
+        chunk_positions = None if positions is None else positions[start:hi]
+        moments = skewKurtRows(x[start:hi], missing[start:hi], shift, windows, chunk_positions)
+        out[:, lo:hi] = moments[:, lo - start :]
+    return out
+
+
+def skewKurtRows(
+    x: np.ndarray, missing: np.ndarray, shift: float, windows: list[int], positions: np.ndarray | None
+) -> np.ndarray:
+    """
+    rollingSkewKurtRows over one chunk, with values shifted by `shift`.
+    """
+    n = len(x)
+    out = np.full((2 * len(windows), n), np.nan)
+    z = np.where(missing, 0.0, x - shift)
+    block = max(max(windows), 1)
+    prefix = []
+    power = np.ones(n)
+    for _ in range(4):
+        power *= z
+        prefix.append(blockPrefixSums(power, block))
+    del z, power
+    row_block = np.arange(n) // block
+
+    # Window means of the four powers, the statistics and the masks are
+    # written into reused buffers (and straight into their rows of `out`):
+    # fresh arrays per window would dominate the run time on long inputs.
+    means = [np.empty(n) for _ in range(4)]
+    m2_buf, sq_buf, tmp_buf = np.empty(n), np.empty(n), np.empty(n)
+    cross_buf, invalid_buf = np.empty(n, dtype=bool), np.empty(n, dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i, w in enumerate(windows):
+            if w > n or w < 3:
+                continue
+            m = n - w + 1
+            cross = np.not_equal(row_block[:m], row_block[w - 1 :], out=cross_buf[:m])
+            s1, s2, s3, s4 = (
+                np.subtract(inclusive[w - 1 :], exclusive[:m], out=buf[:m])
+                for (inclusive, exclusive, _), buf in zip(prefix, means)
+            )
+            for (_, _, total), s in zip(prefix, (s1, s2, s3, s4)):
+                np.add(s, total[:m], out=s, where=cross)
+                s /= w
+            a, tmp = s1, tmp_buf[:m]
+            a2 = np.multiply(a, a, out=sq_buf[:m])
+            m2 = np.subtract(s2, a2, out=m2_buf[:m])
+            np.add(s2, 1e-300, out=tmp)
+            tmp *= 1e-14
+            invalid = np.less_equal(m2, tmp, out=invalid_buf[:m])
+            invalid |= incompleteWindows(missing, w, positions)
+
+            # m3 = s3 - 3 a s2 + 2 a^3
+            skew = out[2 * i, w - 1 :]
+            np.multiply(a, s2, out=tmp)
+            tmp *= 3.0
+            np.subtract(s3, tmp, out=skew)
+            np.multiply(a2, a, out=tmp)
+            tmp *= 2.0
+            skew += tmp
+            skew /= np.power(m2, 1.5, out=tmp)
+            skew *= np.sqrt(w * (w - 1.0)) / (w - 2.0)
+            skew[invalid] = np.nan
+            if w >= 4:
+                # m4 = s4 - 4 a s3 + 6 a^2 s2 - 3 a^4
+                kurt = out[2 * i + 1, w - 1 :]
+                np.multiply(a, s3, out=tmp)
+                tmp *= 4.0
+                np.subtract(s4, tmp, out=kurt)
+                np.multiply(a2, s2, out=tmp)
+                tmp *= 6.0
+                kurt += tmp
+                np.multiply(a2, a2, out=tmp)
+                tmp *= 3.0
+                kurt -= tmp
+                kurt /= np.multiply(m2, m2, out=tmp)
+                kurt -= 3.0
+                kurt *= w + 1.0
+                kurt += 6.0
+                kurt *= (w - 1.0) / ((w - 2.0) * (w - 3.0))
+                kurt[invalid] = np.nan
+    return out
+
+
+def rollingMinMax(x: np.ndarray, w: int, positions: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling minimum and maximum over windows of w rows in O(n).
+
+    The van Herk/Gil-Werman scheme: the array is cut into blocks of w rows,
+    and running extrema are taken forwards and backwards within each block.
+    A window spans at most two blocks, so its extremum is that of the
+    suffix of the first block and the prefix of the second. Every step is
+    a vectorized accumulate, with no per-row Python loop or deque.
+
+    Returns
+    -------
+    (rolling_min, rolling_max)
+        Arrays of len(x); NaN until a full window is available and whenever
+        the window contains a NaN or reaches into the previous segment.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    lo = np.full(n, np.nan)
+    hi = np.full(n, np.nan)
+    if w > n or w < 1:
+        return lo, hi
+
+    missing = np.isnan(x)
+    n_blocks = -(-n // w)
+    for out, fill, accumulate in ((lo, np.inf, np.minimum), (hi, -np.inf, np.maximum)):
+        padded = np.full(n_blocks * w, fill)
+        padded[:n] = np.where(missing, fill, x)
+        blocks = padded.reshape(n_blocks, w)
+        prefix = accumulate.accumulate(blocks, axis=1).reshape(-1)
+        suffix = accumulate.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1)
+        out[w - 1 :] = accumulate(suffix[: n - w + 1], prefix[w - 1 : n])
+        out[w - 1 :][incompleteWindows(missing, w, positions)] = np.nan
+    return lo, hi
+
+
+def ewmMeanVol(
+    x: np.ndarray, halflife: float, starts: np.ndarray, min_periods: int = 1
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Exponentially weighted mean and standard deviation with a half-life in
+    rows, restarting at every segment start.
+
+    Uses pandas' own single-pass EWM kernels, grouped by segment:
+    `ewm(halflife=..., adjust=True, ignore_na=False)` with the
+    bias-corrected `.std()`. NaNs carry no weight but still age the earlier
+    observations.
+
+    Returns
+    -------
+    (mean, std)
+        Arrays of len(x); NaN until a segment has `min_periods` valid values
+        (and at least two, for the standard deviation).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) == 0:
+        return np.full(0, np.nan), np.full(0, np.nan)
+    segments = np.cumsum(starts)
+    ewm = pd.Series(x).groupby(segments, sort=False).ewm(halflife=halflife, min_periods=min_periods)
+    # Segments are contiguous and in order, so the grouped results are in row order.
+    return ewm.mean().to_numpy(), ewm.std().to_numpy()
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from feature_registry import addExtraArgs, contextRows, extraFeatureNames, familyParams, featureNames, parseExtraArgs
+from features import readWarmWindow
+from store_sqlite import BACKENDS, lastStoredDate, onlySeriesId
+
+# Running window sums are recomputed exactly this often, so rounding error
+# from adding and removing returns cannot build up over a long session.
+RESYNC_UPDATES = 10_000
+
+
+class OnlineFeatures:
+    """
+    Constant-time feature state for scoring one series as new prices arrive.
+
+    Keeps the latest log price, a ring buffer of the last log returns and a
+    running sum and sum of squares per rolling window. Each update touches
+    one buffer slot and two sums per window, independent of the history
+    length and of the window sizes, and produces the same feature vector as
+    the last row of features.buildFeatureMatrix with the same lags/windows
+    (rolling statistics to within float summation error).
+
+    Extra features keep their own O(1) state: running sums of the first four
+    powers for skewness/kurtosis, monotonic deques of candidate extrema for
+    min/max (amortised O(1)), and decayed sums updated by one multiply-add
+    each for EWMA mean/volatility.
+
+    Parameters
+    ----------
+    lags:
+        Return lags, as for buildFeatureMatrix.
+    windows:
+        Rolling windows, as for buildFeatureMatrix.
+    extra:
+        Extra features, as for buildFeatureMatrix (see
+        feature_registry.extraFeatureNames).
+
+    Attributes
+    ----------
+    columns:
+        Feature names of the vector, in buildFeatureMatrix column order.
+    last_date:
+        Date of the last accepted price, if dates were given.
+    """
+
+    def __init__(self, lags: list[int], windows: list[int], extra: list[str] = ()) -> None:
+        if any(int(k) < 1 for k in list(lags) + list(windows)):
+            raise ValueError(f"lags and windows must be positive. Got: {lags}, {windows}")
+        self.lags = [int(lag) for lag in lags]
+        self.windows = [int(w) for w in windows]
+        self.extra = list(extra)
+        self.columns = featureNames(self.lags, self.windows, self.extra, intermediates=False)[:-1]
+        self.last_date: pd.Timestamp | None = None
+
+        zscore_windows = familyParams(self.extra, ("r_zscore",))
+        self._moment_windows = familyParams(self.extra, ("r_roll_skew", "r_roll_kurt"))
+        self._minmax_windows = familyParams(self.extra, ("r_roll_min", "r_roll_max"))
+        self._halflives = familyParams(self.extra, ("r_ewm_mean", "r_ewm_vol"))
+        # Raises for parameters whose features could never be defined.
+        known = set(
+            extraFeatureNames(self._halflives, self._moment_windows, self._minmax_windows, zscore_windows)
+        )
+        if any(name not in known for name in self.extra):
+            raise ValueError(f"Unsupported extra features: {self.extra}")
+
+        # Returns needed for the longest lag (k back from the current one) or window.
+        self._size = max(
+            [lag + 1 for lag in self.lags]
+            + self.windows
+            + zscore_windows
+            + self._moment_windows
+            + self._minmax_windows
+            + [1]
+        )
+        self._returns = [0.0] * self._size
+        self._pos = 0
+        self._n_returns = 0
+        self._last_log_price: float | None = None
+        self._shift = 0.0
+        # Mean/std sums, shared by the rolling statistics and z-scores of a window.
+        self._sum_windows = sorted(set(self.windows) | set(zscore_windows))
+        self._sum1 = [0.0] * len(self._sum_windows)
+        self._sum2 = [0.0] * len(self._sum_windows)
+        self._moments = [[0.0] * 4 for _ in self._moment_windows]
+        self._lows = [deque() for _ in self._minmax_windows]
+        self._highs = [deque() for _ in self._minmax_windows]
+        self._ewm = [[0.0] * 4 for _ in self._halflives]  # decayed sums of 1, 1 (squared decay), z, z^2
+        self._since_resync = 0
+        self._vector = [math.nan] * len(self.columns)
+
+        # Where each output reads its value: (kind, index into that kind's state).
+        self._slots = [("roll", self._sum_windows.index(w)) for w in self.windows]
+        for name in self.extra:
+            prefix, _, param = name.rpartition("_")
+            k = int(param)
+            if prefix == "r_zscore":
+                self._slots.append(("zscore", self._sum_windows.index(k)))
+            elif prefix in ("r_roll_skew", "r_roll_kurt"):
+                self._slots.append((prefix[7:], self._moment_windows.index(k)))
+            elif prefix in ("r_roll_min", "r_roll_max"):
+                self._slots.append((prefix[7:], self._minmax_windows.index(k)))
+            else:
+                self._slots.append((prefix[6:], self._halflives.index(k)))
+
+    @classmethod
+    def fromHistory(
+        cls, df: pd.DataFrame, lags: list[int], windows: list[int], extra: list[str] = ()
+    ) -> OnlineFeatures:
+        """
+        Seed the state from a date-sorted ["date", "value"] frame. Only the
+        last valid observations the features need are replayed.
+        """
+        state = cls(lags, windows, extra)
+        valid = df[df["value"] > 0].tail(state.history_rows)
+        for date, value in zip(valid["date"], valid["value"].to_numpy(dtype=np.float64)):
+            state.update(float(value), date)
+        return state
+
+    @property
+    def history_rows(self) -> int:
+        """
+        Number of valid prices needed before the first complete feature
+        vector, and to seed EWMA features with the same context as
+        features.warmupRows.
+        """
+        return max(self._size, contextRows(self.extra)) + 1
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether every feature of the current vector is defined.
+        """
+        return self._n_returns >= self._size and not any(math.isnan(x) for x in self._vector)
+
+    def update(self, value: float, date: pd.Timestamp | None = None) -> bool:
+        """
+        Add the next price and refresh the feature vector in O(1).
+
+        Missing or non-positive prices are ignored, as buildFeatureMatrix
+        drops them.
+
+        Returns
+        -------
+        bool
+            Whether the feature vector is complete (see `ready`).
+
+        Raises
+        ------
+        ValueError
+            If `date` is not after the last accepted date.
+        """
+        if not value > 0:
+            return self.ready
+        if date is not None:
+            date = pd.Timestamp(date)
+            if self.last_date is not None and date <= self.last_date:
+                raise ValueError(f"Prices must arrive in date order: {date} is not after {self.last_date}")
+            self.last_date = date
+
+        log_price = math.log(value)
+        if self._last_log_price is None:
+            self._last_log_price = log_price
+            return False
+        r = log_price - self._last_log_price
+        self._last_log_price = log_price
+        if self._n_returns == 0:
+            # Sums are kept relative to the first return (shifted-data variance).
+            self._shift = r
+
+        size, pos, shift, t = self._size, self._pos, self._shift, self._n_returns
+        returns, sum1, sum2 = self._returns, self._sum1, self._sum2
+        z = r - shift
+        for i, w in enumerate(self._sum_windows):
+            if t >= w:
+                old = returns[(pos - w) % size] - shift
+                sum1[i] += z - old
+                sum2[i] += z * z - old * old
+            else:
+                sum1[i] += z
+                sum2[i] += z * z
+        for w, sums in zip(self._moment_windows, self._moments):
+            old = returns[(pos - w) % size] - shift if t >= w else 0.0
+            sums[0] += z - old
+            sums[1] += z * z - old * old
+            sums[2] += z**3 - old**3
+            sums[3] += z**4 - old**4
+        for w, lows, highs in zip(self._minmax_windows, self._lows, self._highs):
+            # Each deque holds (index, return) of the values that can still be
+            # the window's extremum, in index order; the front is the extremum.
+            while lows and lows[-1][1] >= r:
+                lows.pop()
+            while highs and highs[-1][1] <= r:
+                highs.pop()
+            lows.append((t, r))
+            highs.append((t, r))
+            if lows[0][0] <= t - w:
+                lows.popleft()
+            if highs[0][0] <= t - w:
+                highs.popleft()
+        for h, sums in zip(self._halflives, self._ewm):
+            decay = 0.5 ** (1.0 / h)
+            sums[0] = decay * sums[0] + 1.0
+            sums[1] = decay * decay * sums[1] + 1.0
+            sums[2] = decay * sums[2] + z
+            sums[3] = decay * sums[3] + z * z
+        returns[pos] = r
+        self._pos = (pos + 1) % size
+        self._n_returns = n = t + 1
+
+        self._since_resync += 1
+        if self._since_resync >= RESYNC_UPDATES:
+            self._resync()
+
+        vector, j = self._vector, 0
+        for lag in self.lags:
+            vector[j] = returns[(pos - lag) % size] if self._n_returns > lag else math.nan
+            j += 1
+        for kind, i in self._slots:
+            if kind == "roll":
+                vector[j], vector[j + 1] = self._meanStd(i)
+                j += 2
+                continue
+            if kind == "zscore":
+                mean, std = self._meanStd(i)
+                vector[j] = (r - mean) / std if std > 0 else math.nan
+            elif kind in ("skew", "kurt"):
+                vector[j] = self._moment(kind, i)
+            elif kind in ("min", "max"):
+                extrema = self._lows[i] if kind == "min" else self._highs[i]
+                vector[j] = extrema[0][1] if n >= self._minmax_windows[i] else math.nan
+            else:
+                vector[j] = self._ewmStat(kind, i)
+            j += 1
+        return self.ready
+
+    def _meanStd(self, i: int) -> tuple[float, float]:
+        """
+        Rolling mean and standard deviation of the i-th summed window.
+        """
+        w = self._sum_windows[i]
+        if self._n_returns < w:
+            return math.nan, math.nan
+        mean = self._sum1[i] / w
+        std = math.sqrt(max(self._sum2[i] - self._sum1[i] * mean, 0.0) / (w - 1)) if w > 1 else math.nan
+        return mean + self._shift, std
+
+    def _moment(self, kind: str, i: int) -> float:
+        """
+        Rolling skewness or excess kurtosis of the i-th moment window, with
+        the bias corrections of feature_kernels.rollingSkewKurtRows.
+        """
+        w = self._moment_windows[i]
+        if self._n_returns < w or w < (3 if kind == "skew" else 4):
+            return math.nan
+        s1, s2, s3, s4 = (s / w for s in self._moments[i])
+        m2 = s2 - s1 * s1
+        if m2 <= 1e-14 * (s2 + 1e-300):
+            return math.nan
+        if kind == "skew":
+            m3 = s3 - 3.0 * s1 * s2 + 2.0 * s1**3
+            return math.sqrt(w * (w - 1.0)) / (w - 2.0) * m3 / m2**1.5
+        m4 = s4 - 4.0 * s1 * s3 + 6.0 * s1 * s1 * s2 - 3.0 * s1**4
+        g2 = m4 / (m2 * m2) - 3.0
+        return ((w + 1.0) * g2 + 6.0) * (w - 1.0) / ((w - 2.0) * (w - 3.0))
+
+    def _ewmStat(self, kind: str, i: int) -> float:
+        """
+        EWMA mean or volatility for the i-th half-life, as
+        feature_kernels.ewmMeanVol with min_periods equal to the half-life.
+        """
+        h = self._halflives[i]
+        if self._n_returns < max(h, 1 if kind == "mean" else 2):
+            return math.nan
+        sum_w, sum_w2, sum_z, sum_zz = self._ewm[i]
+        mean = sum_z / sum_w
+        if kind == "mean":
+            return mean + self._shift
+        var = max(sum_zz / sum_w - mean * mean, 0.0) * (sum_w * sum_w) / (sum_w * sum_w - sum_w2)
+        return math.sqrt(var)
+
+    def _resync(self) -> None:
+        """
+        Recompute the window sums exactly from the ring buffer.
+        """
+        for i, w in enumerate(self._sum_windows):
+            recent = self._recent(w)
+            self._sum1[i] = math.fsum(recent)
+            self._sum2[i] = math.fsum(z * z for z in recent)
+        for w, sums in zip(self._moment_windows, self._moments):
+            recent = self._recent(w)
+            sums[:] = [math.fsum(z**p for z in recent) for p in range(1, 5)]
+        self._since_resync = 0
+
+    def _recent(self, w: int) -> list[float]:
+        """
+        The last (up to) w returns, shifted, newest first.
+        """
+        n = min(w, self._n_returns)
+        return [self._returns[(self._pos - 1 - k) % self._size] - self._shift for k in range(n)]
+
+    def features(self) -> np.ndarray:
+        """
+        The current feature vector, ordered as `columns` (NaN where undefined).
+        """
+        return np.array(self._vector)
+
+    def score(self, coef: list[float], intercept: float) -> float:
+        """
+        Linear model prediction for the current feature vector, e.g. with the
+        coefficients written by train_eval.py --out-model.
+        """
+        return intercept + math.fsum(c * x for c, x in zip(coef, self._vector))
+
+
+def readLinearModel(path: str) -> tuple[list[str], list[float], float]:
+    """
+    Read (features_used, coef, intercept) from a model JSON written by
+    train_eval.py --out-model.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        model = json.load(f)
+    return model["features_used"], [float(c) for c in model["coef"]], float(model["intercept"])
+
+
+def main(
+    db_path: str,
+    in_table: str,
+    model_path: str,
+    lags: list[int],
+    windows: list[int],
+    series_id: str | None = None,
+    backend: str = "sqlite",
+    extra: list[str] = (),
+) -> None:
+    """
+    Score a series in real time.
+
+    The online state is seeded from the last stored observations, the
+    current prediction is printed, and then every `date,value` line read
+    from stdin updates the state and prints `date,prediction` (empty while
+    the features are incomplete).
+
+    Raises
+    ------
+    ValueError
+        If the model was trained on different features than lags/windows/extra give.
+    """
+    if series_id is None:
+        series_id = onlySeriesId(db_path, in_table, backend=backend)
+    feature_cols, coef, intercept = readLinearModel(model_path)
+
+    state = OnlineFeatures(lags, windows, extra)
+    if feature_cols != state.columns:
+        raise ValueError(f"Model features {feature_cols} differ from the online features {state.columns}")
+    last = lastStoredDate(db_path, in_table, series_id=series_id, backend=backend)
+    if last is not None:
+        history = readWarmWindow(
+            db_path, in_table, series_id, state.history_rows, start=last, lookahead_rows=0, backend=backend
+        )
+        state = OnlineFeatures.fromHistory(history, lags, windows, extra)
+
+    def emit() -> None:
+        prediction = f"{state.score(coef, intercept):.10g}" if state.ready else ""
+        date = "" if state.last_date is None else state.last_date.date()
+        print(f"{date},{prediction}", flush=True)
+
+    emit()
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        date, value = line.split(",")
+        state.update(float(value), pd.Timestamp(date))
+        emit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db-path", required=True)
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite", help="Storage backend of --db-path")
+    parser.add_argument("--in-table", required=True)
+    parser.add_argument("--series-id", help="Series to select from a multi-series table")
+    parser.add_argument("--model", required=True, help="Model JSON written by train_eval.py --out-model")
+    parser.add_argument("--lags", required=True, help="Comma-separated list, e.g. 1,3,6,12")
+    parser.add_argument("--windows", required=True, help="Comma-separated list, e.g. 3,6,12")
+    addExtraArgs(parser)
+    args = parser.parse_args()
+
+    lags = [int(x.strip()) for x in args.lags.split(",") if x.strip()]
+    windows = [int(x.strip()) for x in args.windows.split(",") if x.strip()]
+    extra = parseExtraArgs(args, parser)
+    main(
+        args.db_path,
+        args.in_table,
+        args.model,
+        lags,
+        windows,
+        series_id=args.series_id,
+        backend=args.backend,
+        extra=extra,
+    )
@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+import argparse
+from typing import Callable, Iterator, NamedTuple
+
+import math
+
+import numpy as np
+
+from feature_kernels import (
+    ewmMeanVol,
+    lagWithin,
+    rollingMeanStdRows,
+    rollingMinMax,
+    rollingSkewKurtRows,
+    segmentPositions,
+)
+from feature_store import TARGET
+
+# Arrays the caller provides; every other node is computed from them.
+SOURCE_COLUMNS = ("value", "starts")
+
+# Optional feature families, configured by parameter lists (see extraFeatureNames).
+EXTRA_FAMILIES = {
+    "ewm_halflives": ("r_ewm_mean", "r_ewm_vol"),
+    "moment_windows": ("r_roll_skew", "r_roll_kurt"),
+    "minmax_windows": ("r_roll_min", "r_roll_max"),
+    "zscore_windows": ("r_zscore",),
+}
+
+# Extra families computed over a window of the last w returns.
+EXTRA_ROLLING_FAMILIES = ("r_roll_skew", "r_roll_kurt", "r_roll_min", "r_roll_max", "r_zscore")
+
+# EWMA features read this many half-lives of history as context: older
+# observations carry a weight below 2**-64 and cannot change a double.
+EWM_MEMORY_HALFLIVES = 64
+
+
+class Feature(NamedTuple):
+    """
+    A node of the feature graph.
+
+    Attributes
+    ----------
+    name:
+        Column name of the computed array.
+    inputs:
+        Names of the nodes (or source columns) it is computed from.
+    compute:
+        Called as compute(plan, *input_arrays), where `plan` is the set of
+        node names being evaluated; returns a 1-D array (or, for shared
+        intermediates, any array its dependents know how to read).
+    """
+
+    name: str
+    inputs: tuple[str, ...]
+    compute: Callable[..., np.ndarray]
+
+
+FEATURES: dict[str, Feature] = {}
+FEATURE_FAMILIES: dict[str, Callable[[int], tuple[tuple[str, ...], Callable[..., np.ndarray]]]] = {}
+
+
+def registerFeature(name: str, inputs: tuple[str, ...]) -> Callable:
+    """
+    Decorator registering a compute function as the feature `name`.
+    """
+
+    def register(compute: Callable[..., np.ndarray]) -> Callable[..., np.ndarray]:
+        FEATURES[name] = Feature(name, inputs, compute)
+        return compute
+
+    return register
+
+
+def registerFamily(prefix: str) -> Callable:
+    """
+    Decorator registering a family of features named `<prefix>_<k>` for
+    integer parameters k (e.g., lags or window sizes). The decorated factory
+    takes k and returns (inputs, compute).
+    """
+
+    def register(factory: Callable) -> Callable:
+        FEATURE_FAMILIES[prefix] = factory
+        return factory
+
+    return register
+
+
+def lookupFeature(name: str) -> Feature:
+    """
+    Registered feature for a name, instantiating parametrised families.
+
+    Raises
+    ------
+    ValueError
+        If no feature or family matches the name.
+    """
+    if name in FEATURES:
+        return FEATURES[name]
+    prefix, _, param = name.rpartition("_")
+    if prefix in FEATURE_FAMILIES and param.isdigit():
+        inputs, compute = FEATURE_FAMILIES[prefix](int(param))
+        return Feature(name, inputs, compute)
+    raise ValueError(f"Unknown feature {name!r}")
+
+
+def resolveFeatures(names: list[str], sources: tuple[str, ...] = SOURCE_COLUMNS) -> list[Feature]:
+    """
+    The requested features and everything they depend on, in dependency order.
+
+    Only nodes reachable from `names` are included, so registered features
+    that nothing asks for cost nothing. Each node appears once, however many
+    features share it.
+
+    Raises
+    ------
+    ValueError
+        If a name is unknown or the dependencies form a cycle.
+    """
+    order: list[Feature] = []
+    state: dict[str, str] = {}
+
+    def visit(name: str) -> None:
+        if name in sources or state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Feature dependency cycle through {name!r}")
+        state[name] = "visiting"
+        feature = lookupFeature(name)
+        for dep in feature.inputs:
+            visit(dep)
+        state[name] = "done"
+        order.append(feature)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def iterFeatures(sources: dict[str, np.ndarray], names: list[str]) -> Iterator[tuple[str, np.ndarray]]:
+    """
+    Compute the requested features from the source arrays, yielding each
+    (name, array) as soon as it is computed.
+
+    Nodes are evaluated lazily in dependency order (see resolveFeatures) and
+    each one exactly once; shared intermediates such as `log_return` or the
+    rolling prefix sums are reused by every feature that reads them. The
+    engine drops every array, sources included, once its last reader has run
+    (and, for requested features, once it has been yielded), so a caller that
+    consumes each column as it arrives holds only the live intermediates.
+
+    Parameters
+    ----------
+    sources:
+        The SOURCE_COLUMNS arrays: positive `value`s, and `starts` marking the
+        first row of each series (rows of a series must be contiguous and
+        date-sorted).
+    names:
+        Features to compute; yielded in dependency order, not in this order.
+    """
+    wanted = set(names)
+    plan = resolveFeatures(names, sources=tuple(sources))
+    plan_names = frozenset(feature.name for feature in plan)
+    readers: dict[str, int] = {}
+    for feature in plan:
+        for dep in feature.inputs:
+            readers[dep] = readers.get(dep, 0) + 1
+
+    values = dict(sources)
+    del sources
+    for feature in plan:
+        values[feature.name] = feature.compute(plan_names, *(values[dep] for dep in feature.inputs))
+        if feature.name in wanted:
+            yield feature.name, values[feature.name]
+        for dep in feature.inputs:
+            readers[dep] -= 1
+            if readers[dep] == 0:
+                del values[dep]
+        if readers.get(feature.name, 0) == 0:
+            del values[feature.name]
+
+
+def evaluateFeatures(sources: dict[str, np.ndarray], names: list[str]) -> dict[str, np.ndarray]:
+    """
+    Compute the requested features from the source arrays (see iterFeatures).
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        One array per requested name, in the order requested.
+    """
+    columns = dict(iterFeatures(sources, names))
+    return {name: columns[name] for name in names}
+
+
+def featureNames(
+    lags: list[int], windows: list[int], extra: list[str] = (), intermediates: bool = True
+) -> list[str]:
+    """
+    Output columns of features.buildFeatureMatrix for the given lags,
+    windows and extra features, in column order. Without `intermediates`,
+    only the model inputs and the target are listed (log_price and
+    log_return are then computed but not kept).
+    """
+    names = ["log_price", "log_return"] if intermediates else []
+    names += [f"r_lag_{lag}" for lag in lags]
+    names += [f"r_roll_{stat}_{w}" for w in windows for stat in ("mean", "std")]
+    return names + list(extra) + [TARGET]
+
+
+def extraFeatureNames(
+    ewm_halflives: list[int] = (),
+    moment_windows: list[int] = (),
+    minmax_windows: list[int] = (),
+    zscore_windows: list[int] = (),
+) -> list[str]:
+    """
+    Names of the optional feature families for the given parameters:
+    EWMA mean/volatility of returns per half-life (in rows), rolling
+    skewness/kurtosis, rolling min/max and the rolling z-score of the latest
+    return per window.
+
+    Raises
+    ------
+    ValueError
+        If a parameter is too small for its features to ever be defined:
+        kurtosis needs windows of at least 4 returns and the z-score (a
+        sample standard deviation) at least 2; half-lives and min/max
+        windows must be positive.
+    """
+    for key, values, smallest in (
+        ("ewm_halflives", ewm_halflives, 1),
+        ("moment_windows", moment_windows, 4),
+        ("minmax_windows", minmax_windows, 1),
+        ("zscore_windows", zscore_windows, 2),
+    ):
+        if any(int(k) < smallest for k in values):
+            raise ValueError(f"{key} must all be at least {smallest}. Got: {list(values)}")
+    params = {
+        "ewm_halflives": ewm_halflives,
+        "moment_windows": moment_windows,
+        "minmax_windows": minmax_windows,
+        "zscore_windows": zscore_windows,
+    }
+    return [f"{prefix}_{k}" for key, prefixes in EXTRA_FAMILIES.items() for k in params[key] for prefix in prefixes]
+
+
+def addExtraArgs(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the comma-separated extra feature family options (see
+    extraFeatureNames) to a CLI parser; read them back with parseExtraArgs.
+    """
+    parser.add_argument("--ewm-halflives", default="", help="EWMA mean/volatility half-lives in rows, e.g. 5,20")
+    parser.add_argument("--moment-windows", default="", help="Rolling skewness/kurtosis windows, e.g. 12")
+    parser.add_argument("--minmax-windows", default="", help="Rolling min/max windows, e.g. 12")
+    parser.add_argument("--zscore-windows", default="", help="Rolling z-score windows, e.g. 12")
+
+
+def parseExtraArgs(args: argparse.Namespace, parser: argparse.ArgumentParser) -> list[str]:
+    """
+    Extra feature names for the options added by addExtraArgs. Malformed or
+    too small values exit through parser.error.
+    """
+    try:
+        return extraFeatureNames(
+            ewm_halflives=[int(x.strip()) for x in args.ewm_halflives.split(",") if x.strip()],
+            moment_windows=[int(x.strip()) for x in args.moment_windows.split(",") if x.strip()],
+            minmax_windows=[int(x.strip()) for x in args.minmax_windows.split(",") if x.strip()],
+            zscore_windows=[int(x.strip()) for x in args.zscore_windows.split(",") if x.strip()],
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def contextRows(names: list[str]) -> int:
+    """
+    Observations of history the extra features in `names` depend on: the
+    window for rolling families, EWM_MEMORY_HALFLIVES half-lives for EWMA.
+    """
+    rows = 1
+    for name in names:
+        prefix, _, param = name.rpartition("_")
+        if not param.isdigit():
+            continue
+        if prefix in ("r_ewm_mean", "r_ewm_vol"):
+            rows = max(rows, math.ceil(EWM_MEMORY_HALFLIVES * int(param)))
+        elif prefix in EXTRA_ROLLING_FAMILIES:
+            rows = max(rows, int(param))
+    return rows
+
+
+def firstValidRow(names: list[str]) -> int:
+    """
+    Position within a series before which some feature in `names` is
+    always missing: a lag k needs k earlier returns (position k + 1), a
+    window w needs w returns, EWMA features need `half-life` returns (two
+    for the volatility). Later rows can still be missing, e.g. where a
+    window has zero variance.
+    """
+    row = 0
+    for name in names:
+        if name == "log_return":
+            row = max(row, 1)
+            continue
+        prefix, _, param = name.rpartition("_")
+        if not param.isdigit():
+            continue
+        k = int(param)
+        if prefix == "r_lag":
+            row = max(row, k + 1)
+        elif prefix == "r_ewm_vol":
+            row = max(row, k, 2)
+        elif prefix in ("r_roll_mean", "r_roll_std", "r_ewm_mean", *EXTRA_ROLLING_FAMILIES):
+            row = max(row, k, 1)
+    return row
+
+
+def familyParams(plan: frozenset[str], prefixes: tuple[str, ...]) -> list[int]:
+    """
+    Sorted parameters of the plan's features named `<prefix>_<k>`.
+    """
+    params = set()
+    for name in plan:
+        prefix, _, param = name.rpartition("_")
+        if prefix in prefixes and param.isdigit():
+            params.add(int(param))
+    return sorted(params)
+
+
+def rollingWindows(plan: frozenset[str]) -> list[int]:
+    """
+    Window sizes of the rolling mean/std (and z-score) features in a plan, sorted.
+    """
+    return familyParams(plan, ("r_roll_mean", "r_roll_std", "r_zscore"))
+
+
+def momentWindows(plan: frozenset[str]) -> list[int]:
+    """
+    Window sizes of the rolling skewness/kurtosis features in a plan, sorted.
+    """
+    return familyParams(plan, ("r_roll_skew", "r_roll_kurt"))
+
+
+# --- Feature definitions -----------------------------------------------------
+
+
+@registerFeature("positions", ("starts",))
+def _positions(plan, starts):
+    return segmentPositions(starts)
+
+
+@registerFeature("log_price", ("value",))
+def _logPrice(plan, value):
+    return np.log(value)
+
+
+@registerFeature("log_return", ("log_price", "starts"))
+def _logReturn(plan, log_price, starts):
+    log_return = np.full(len(log_price), np.nan)
+    log_return[1:] = np.diff(log_price)
+    log_return[starts] = np.nan
+    return log_return
+
+
+@registerFeature(TARGET, ("log_return",))
+def _nextReturn(plan, log_return):
+    # log_return is NaN at every series start, so each series' last row gets no target.
+    target = np.full(len(log_return), np.nan)
+    target[:-1] = log_return[1:]
+    return target
+
+
+@registerFamily("r_lag")
+def _lag(lag):
+    return ("log_return", "positions"), lambda plan, log_return, positions: lagWithin(log_return, lag, positions)
+
+
+@registerFeature("r_roll_stats", ("log_return", "positions"))
+def _rollStats(plan, log_return, positions):
+    # Every requested window in one pass over shared prefix sums (see
+    # feature_kernels.rollingMeanStd); rows [mean_w0, std_w0, ...].
+    return rollingMeanStdRows(log_return, rollingWindows(plan), positions=positions)
+
+
+@registerFamily("r_roll_mean")
+def _rollMean(w):
+    return ("r_roll_stats",), lambda plan, stats: stats[2 * rollingWindows(plan).index(w)]
+
+
+@registerFamily("r_roll_std")
+def _rollStd(w):
+    return ("r_roll_stats",), lambda plan, stats: stats[2 * rollingWindows(plan).index(w) + 1]
+
+
+@registerFamily("r_zscore")
+def _zscore(w):
+    # (latest return - rolling mean) / rolling std, over the shared rolling statistics.
+    def compute(plan, log_return, stats):
+        i = rollingWindows(plan).index(w)
+        mean, std = stats[2 * i], stats[2 * i + 1]
+        out = np.full(len(log_return), np.nan)
+        np.divide(log_return - mean, std, out=out, where=std > 0)
+        return out
+
+    return ("log_return", "r_roll_stats"), compute
+
+
+@registerFeature("r_roll_moments", ("log_return", "positions"))
+def _rollMoments(plan, log_return, positions):
+    # Every requested window in one pass; rows [skew_w0, kurt_w0, ...].
+    return rollingSkewKurtRows(log_return, momentWindows(plan), positions=positions)
+
+
+@registerFamily("r_roll_skew")
+def _rollSkew(w):
+    return ("r_roll_moments",), lambda plan, moments: moments[2 * momentWindows(plan).index(w)]
+
+
+@registerFamily("r_roll_kurt")
+def _rollKurt(w):
+    return ("r_roll_moments",), lambda plan, moments: moments[2 * momentWindows(plan).index(w) + 1]
+
+
+@registerFamily("r_roll_minmax")
+def _rollMinMax(w):
+    def compute(plan, log_return, positions):
+        return np.stack(rollingMinMax(log_return, w, positions=positions))
+
+    return ("log_return", "positions"), compute
+
+
+@registerFamily("r_roll_min")
+def _rollMin(w):
+    return (f"r_roll_minmax_{w}",), lambda plan, minmax: minmax[0]
+
+
+@registerFamily("r_roll_max")
+def _rollMax(w):
+    return (f"r_roll_minmax_{w}",), lambda plan, minmax: minmax[1]
+
+
+@registerFamily("r_ewm_stats")
+def _ewmStats(h):
+    # EWMA mean and volatility share their decayed sums; both are defined
+    # once the series has h returns.
+    def compute(plan, log_return, starts):
+        return np.stack(ewmMeanVol(log_return, h, starts, min_periods=h))
+
+    return ("log_return", "starts"), compute
+
+
+@registerFamily("r_ewm_mean")
+def _ewmMean(h):
+    return (f"r_ewm_stats_{h}",), lambda plan, stats: stats[0]
+
+
+@registerFamily("r_ewm_vol")
+def _ewmVol(h):
+    return (f"r_ewm_stats_{h}",), lambda plan, stats: stats[1]
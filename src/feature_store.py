@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+TARGET = "y_next_return"
+NON_FEATURE_COLS = {"series_id", "date", "value", "log_price", "log_return", TARGET}
+STORE_FORMAT_VERSION = 1
+STORE_DTYPES = ("float64", "float32")
+
+
+def featureColumns(columns) -> list[str]:
+    """
+    Model input columns of a feature matrix, in column order.
+    """
+    return [c for c in columns if c not in NON_FEATURE_COLS]
+
+
+def isFeatureStore(path: str) -> bool:
+    """
+    Whether a path names a feature store directory rather than a CSV file.
+    """
+    return os.path.splitext(path)[1].lower() != ".csv"
+
+
+def writeFeatureStore(
+    feat: pd.DataFrame,
+    out_dir: str,
+    series_id: str | None = None,
+    dtype: str = "float64",
+    extra_meta: dict | None = None,
+) -> None:
+    """
+    Persist a feature matrix as typed binary arrays plus a metadata sidecar.
+
+    The directory holds `X.npy` (rows x features, C order), `y.npy` (target),
+    `dates.npy` (datetime64[ns]) and `meta.json` (feature names, target,
+    row count, dtype). `.npy` arrays keep full float precision and
+    can be memory-mapped by readFeatureStore without parsing or copying.
+    The directory is replaced atomically, so readers never see a mix of old
+    and new arrays.
+
+    Parameters
+    ----------
+    feat:
+        Date-sorted output of features.buildFeatureMatrix.
+    out_dir:
+        Output directory (e.g., "data/processed/coffee_features").
+    series_id:
+        Optional source series, recorded so appends can be checked against it.
+    dtype:
+        "float64", or "float32" for a compact store of half the size (see
+        features.buildFeatureMatrix with compact=True).
+    extra_meta:
+        Optional additional meta.json entries (e.g., a rewritten store's
+        float64_reference); they do not override the ones written here.
+    """
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"dtype must be one of {STORE_DTYPES}. Got: {dtype!r}")
+    feature_cols = featureColumns(feat.columns)
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, "X.npy"), np.ascontiguousarray(feat[feature_cols].to_numpy(dtype=dtype)))
+    np.save(os.path.join(tmp_dir, "y.npy"), feat[TARGET].to_numpy(dtype=dtype))
+    np.save(os.path.join(tmp_dir, "dates.npy"), feat["date"].to_numpy(dtype="datetime64[ns]"))
+    meta = {
+        **(extra_meta or {}),
+        "format_version": STORE_FORMAT_VERSION,
+        "n_rows": int(len(feat)),
+        "feature_cols": feature_cols,
+        "target": TARGET,
+        "series_id": series_id,
+        "dtype": dtype,
+    }
+    writeMeta(tmp_dir, meta)
+    replaceDir(tmp_dir, out_dir)
+
+
+def replaceDir(tmp_dir: str, out_dir: str) -> None:
+    """
+    Move a fully written directory into place, replacing any existing one.
+    """
+    if os.path.isdir(out_dir):
+        old_dir = f"{out_dir.rstrip(os.sep)}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(out_dir, old_dir)
+        os.replace(tmp_dir, out_dir)
+        shutil.rmtree(old_dir)
+    else:
+        os.replace(tmp_dir, out_dir)
+
+
+def copyFeatureStore(src: str, out_dir: str) -> None:
+    """
+    Copy a feature store directory, replacing `out_dir` atomically.
+    """
+    tmp_dir = f"{out_dir.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    shutil.copytree(src, tmp_dir)
+    replaceDir(tmp_dir, out_dir)
+
+
+def readMeta(path: str) -> dict:
+    """
+    Read and validate the metadata sidecar of a feature store.
+
+    Raises
+    ------
+    ValueError
+        If the store was written with an unknown format version.
+    """
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format_version") != STORE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported feature store version {meta.get('format_version')!r} in {path}")
+    return meta
+
+
+def writeMeta(path: str, meta: dict) -> None:
+    """
+    Atomically replace the metadata sidecar of a feature store.
+    """
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+
+def appendNpy(path: str, rows: np.ndarray, n_rows: int) -> bool:
+    """
+    Append rows to a .npy file in place after its first `n_rows` rows.
+
+    The new rows are written first and the header's shape is rewritten
+    afterwards; any bytes past the new end are truncated. Only format 1.0
+    headers whose padded length does not change can be updated in place.
+
+    Returns
+    -------
+    bool
+        False (with the file untouched) if the file cannot be appended to in
+        place; the caller then rewrites it.
+    """
+    with open(path, "r+b") as f:
+        if np.lib.format.read_magic(f) != (1, 0):
+            return False
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        data_offset = f.tell()
+        if fortran_order or dtype != rows.dtype or shape[1:] != rows.shape[1:] or shape[0] < n_rows:
+            return False
+
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(
+            header,
+            {
+                "descr": np.lib.format.dtype_to_descr(dtype),
+                "fortran_order": False,
+                "shape": (n_rows + len(rows), *shape[1:]),
+            },
+        )
+        if header.tell() != data_offset:
+            return False
+
+        row_bytes = dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+        f.seek(data_offset + n_rows * row_bytes)
+        f.write(np.ascontiguousarray(rows).tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
+
+
+def appendFeatureStore(feat: pd.DataFrame, path: str, series_id: str | None = None) -> int:
+    """
+    Append feature rows newer than the last stored row to a feature store.
+
+    The arrays are extended in place (see appendNpy) and `meta.json` is
+    replaced last. Readers only see the first `n_rows` rows recorded there,
+    so an interrupted append leaves the previous store readable, and a retry
+    overwrites the partial rows. If an array header cannot be updated in
+    place, the whole store is rewritten instead, keeping the other meta.json
+    entries. Rows are stored in the store's dtype.
+
+    Parameters
+    ----------
+    feat:
+        Date-sorted feature rows, all later than the last stored date.
+    path:
+        Existing feature store directory (created if missing).
+    series_id:
+        Optional source series; must match the one recorded in the store.
+
+    Returns
+    -------
+    int
+        Number of rows appended.
+
+    Raises
+    ------
+    ValueError
+        If the feature columns or series differ from the store's, or if the
+        rows do not start after the last stored date.
+    """
+    if not os.path.isdir(path):
+        writeFeatureStore(feat, path, series_id=series_id)
+        return int(len(feat))
+
+    meta = readMeta(path)
+    feature_cols = featureColumns(feat.columns)
+    if feature_cols != meta["feature_cols"]:
+        raise ValueError(f"Feature columns {feature_cols} do not match the store's {meta['feature_cols']} in {path}")
+    if series_id is not None and meta.get("series_id") not in (None, series_id):
+        raise ValueError(f"Feature store {path} holds series {meta['series_id']}, not {series_id}")
+    if feat.empty:
+        return 0
+
+    dates, _, _, _ = readFeatureStore(path)
+    if len(dates) and feat["date"].iloc[0] <= pd.Timestamp(dates[-1]):
+        raise ValueError(f"Appended rows must start after {pd.Timestamp(dates[-1]).date()} in {path}")
+
+    dtype = meta.get("dtype", "float64")
+    arrays = {
+        "X.npy": np.ascontiguousarray(feat[feature_cols].to_numpy(dtype=dtype)),
+        "y.npy": feat[TARGET].to_numpy(dtype=dtype),
+        "dates.npy": feat["date"].to_numpy(dtype="datetime64[ns]"),
+    }
+    n_rows = meta["n_rows"]
+    if not all(appendNpy(os.path.join(path, name), rows, n_rows) for name, rows in arrays.items()):
+        old_dates, old_X, old_y, _ = readFeatureStore(path, mmap=False)
+        old = pd.DataFrame(old_X, columns=feature_cols)
+        old.insert(0, "date", old_dates)
+        old[TARGET] = old_y
+        writeFeatureStore(
+            pd.concat([old, feat[old.columns]], ignore_index=True),
+            path,
+            series_id=meta.get("series_id") or series_id,
+            dtype=dtype,
+            extra_meta=meta,
+        )
+        return int(len(feat))
+
+    meta["n_rows"] = n_rows + len(feat)
+    meta["series_id"] = meta.get("series_id") or series_id
+    writeMeta(path, meta)
+    return int(len(feat))
+
+
+def readFeatureStore(path: str, mmap: bool = True) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[str]]:
+    """
+    Load a feature store written by writeFeatureStore.
+
+    Parameters
+    ----------
+    path:
+        Feature store directory.
+    mmap:
+        If True, arrays are read-only memory maps of the files (no copy);
+        otherwise they are loaded into memory.
+
+    Returns
+    -------
+    (dates, X, y, feature_cols)
+        datetime64[ns] dates, feature matrix and target (float64, or float32
+        for a compact store) and the feature column names, limited to the
+        `n_rows` recorded in meta.json.
+
+    Raises
+    ------
+    ValueError
+        If the store was written with an unknown format version or an array
+        is shorter than the recorded row count.
+    """
+    meta = readMeta(path)
+    n_rows = meta["n_rows"]
+    mode = "r" if mmap else None
+    arrays = []
+    for name in ("dates.npy", "X.npy", "y.npy"):
+        array = np.load(os.path.join(path, name), mmap_mode=mode)
+        if len(array) < n_rows:
+            raise ValueError(f"{name} in {path} has {len(array)} rows, expected {n_rows}")
+        arrays.append(array[:n_rows])
+    dates, X, y = arrays
+    return dates, X, y, meta["feature_cols"]
+
+
+def readFeatureMatrix(path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[str]]:
+    """
+    Load (dates, X, y, feature_cols) from a feature store directory
+    (memory-mapped) or, for backward compatibility, a features CSV.
+    """
+    if isFeatureStore(path):
+        return readFeatureStore(path)
+
+    df = pd.read_csv(path, parse_dates=["date"]).sort_values("date")
+    feature_cols = featureColumns(df.columns)
+    return (
+        df["date"].to_numpy(dtype="datetime64[ns]"),
+        df[feature_cols].to_numpy(dtype=np.float64),
+        df[TARGET].to_numpy(dtype=np.float64),
+        feature_cols,
+    )
@@ -2,13 +2,47 @@ from __future__ import annotations
 
 import argparse
 import os
+from typing import Iterable, Iterator
 
 import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
 
+from feature_cache import FEATURE_CACHE_MAX_BYTES, featureCacheKey, lookupFeatureCache, storeFeatureCache
+from feature_kernels import segmentPositions
+from feature_registry import addExtraArgs, contextRows, featureNames, firstValidRow, iterFeatures, parseExtraArgs
+from feature_store import (
+    STORE_DTYPES,
+    TARGET,
+    appendFeatureStore,
+    copyFeatureStore,
+    featureColumns,
+    isFeatureStore,
+    readFeatureStore,
+    readMeta,
+    replaceDir,
+    writeFeatureStore,
+    writeMeta,
+)
+from modeling import fitRidge, splitIndex
+from store_sqlite import (
+    BACKENDS,
+    SERIES_TABLE,
+    iterSeriesChunks,
+    onlySeriesId,
+    readContentState,
+    readSeriesWindow,
+)
 
-def buildFeatureMatrix(df: pd.DataFrame, lags: list[int], windows: list[int]) -> pd.DataFrame:
+# Tolerances for verifyFeatureStore: incremental rolling statistics may sum
+# in a different order than a full rebuild.
+VERIFY_RTOL = 1e-9
+VERIFY_ATOL = 1e-12
+STREAM_CHUNK_ROWS = 1_000_000
+
+
+def buildFeatureMatrix(
+    df: pd.DataFrame, lags: list[int], windows: list[int], compact: bool = False, extra: list[str] = ()
+) -> pd.DataFrame:
     """
     Build a supervised learning dataset from a time series.
 
@@ -19,6 +53,9 @@ def buildFeatureMatrix(df: pd.DataFrame, lags: list[int], windows: list[int]) ->
     Features:
     - Lagged log returns: r_lag_k
     - Rolling mean/std of log returns: r_roll_mean_w, r_roll_std_w
+    - Optional `extra` features from the registry (see
+      feature_registry.extraFeatureNames): EWMA mean/volatility, rolling
+      skewness/kurtosis, min/max and z-score of returns
 
     Parameters
     ----------
@@ -28,6 +65,11 @@ def buildFeatureMatrix(df: pd.DataFrame, lags: list[int], windows: list[int]) ->
         Return lags to include as features (e.g., [1, 3, 6, 12]).
     windows:
         Rolling windows to compute return statistics (e.g., [3, 6, 12]).
+    compact:
+        If True, keep only `date`, the features and the target, as one
+        contiguous float32 block (see buildFeatureMatrixBatch).
+    extra:
+        Additional registry feature names, e.g. ["r_ewm_vol_6", "r_roll_skew_12"].
 
     Returns
     -------
@@ -35,72 +77,649 @@ def buildFeatureMatrix(df: pd.DataFrame, lags: list[int], windows: list[int]) ->
         DataFrame containing original columns plus engineered features and target.
         Rows with missing values introduced by lag/rolling/shift are dropped.
     """
-    df = df.sort_values("date").copy()
+    feat = buildFeatureMatrixBatch(df.assign(series_id=""), lags=lags, windows=windows, compact=compact, extra=extra)
+    return feat.drop(columns="series_id")
+
+
+def buildFeatureMatrixBatch(
+    df: pd.DataFrame, lags: list[int], windows: list[int], compact: bool = False, extra: list[str] = ()
+) -> pd.DataFrame:
+    """
+    Build the buildFeatureMatrix features for many series in one vectorized pass.
+
+    The long-format rows are sorted by (series_id, date) so every series is
+    one contiguous segment. The requested columns are evaluated from the
+    feature registry (see feature_registry.iterFeatures), each over the
+    whole array at once; each row's position within its segment masks out
+    any value that would come from another series, so no window, lag or
+    target crosses a series boundary. There is no Python loop over series.
+
+    Parameters
+    ----------
+    df:
+        Long-format DataFrame with at least columns ["series_id", "date", "value"]
+        (e.g., from store_sqlite.readObservations).
+    lags, windows, extra:
+        As for buildFeatureMatrix.
+    compact:
+        If True, drop `value` and the other input columns as soon as they are
+        read, do not keep `log_price`/`log_return`, and return the features
+        and target as one contiguous float32 block beside `series_id` and
+        `date`: less than half the memory of the default float64 frame.
+
+    Returns
+    -------
+    pd.DataFrame
+        Rows sorted by series_id then date, with the original columns plus
+        engineered features and target; rows with missing values are dropped.
+        The float columns are one block, a view of the engine's output array
+        when the kept rows are contiguous (e.g. for a single series).
+    """
+    df = df.sort_values(["series_id", "date"], kind="stable").copy()
 
     # Ensure strictly positive values before log transform
     df["value"] = pd.to_numeric(df["value"], errors="coerce")
-    df = df.dropna(subset=["value"])
-    df = df[df["value"] > 0].copy()
+    df = df[df["value"] > 0].reset_index(drop=True)
+
+    codes = pd.factorize(df["series_id"])[0]
+    starts = np.ones(len(df), dtype=bool)
+    starts[1:] = codes[1:] != codes[:-1]
+
+    # One float block holds every output column except `series_id`/`date`
+    # (and any other input columns); each column is copied into it as it
+    # comes out of the registry, which then releases its own array. It is
+    # laid out one column per row, as pandas stores a float block, so every
+    # fill is contiguous and the frame wraps its transpose without copying.
+    # Window statistics are requested first, and the columns finished before
+    # them (the log prices and returns their kernels read) are held until the
+    # first one arrives, so the block is not allocated while the kernels'
+    # scratch arrays are alive.
+    names = featureNames(lags, windows, extra, intermediates=not compact)
+    block_names = names if compact else ["value", *names]
+    value = df["value"].to_numpy(dtype=np.float64)
+    if compact:
+        df = df[["series_id", "date"]]
+    others = [c for c in df.columns if c not in block_names]
+    block = None
+    windowed = [name for name in names if name.startswith(("r_roll_", "r_ewm_", "r_zscore_"))]
+    requested = windowed + [name for name in names if name not in windowed]
+
+    # Rows kept: past the first position where every feature can exist
+    # (computed from the lags/windows, see firstValidRow), then narrowed by
+    # each column's missing values, as dropna would.
+    valid = segmentPositions(starts) >= firstValidRow(names)
+    for c in others:
+        valid &= df[c].notna().to_numpy()
+    column_index = {name: j for j, name in enumerate(block_names)}
+    pending = []
+    features = iterFeatures({"value": value, "starts": starts}, requested)
+    del value
+    for name, column in features:
+        pending.append((name, column))
+        if block is None and windowed and name not in windowed:
+            continue
+        if block is None:
+            block = np.empty((len(block_names), len(df)), dtype=np.float32 if compact else np.float64)
+            if not compact:
+                block[0] = df["value"].to_numpy()
+        for name, column in pending:
+            block[column_index[name]] = column
+            valid &= ~np.isnan(column)
+        pending.clear()
+
+    # The frame is a view of the block. Contiguous valid rows (the usual case
+    # for one series) are sliced; otherwise they are moved to the front of
+    # the block one column at a time.
+    rows = np.flatnonzero(valid)
+    if len(rows) == 0 or rows[-1] - rows[0] + 1 == len(rows):
+        keep = slice(rows[0], rows[-1] + 1) if len(rows) else slice(0, 0)
+        kept = block[:, keep]
+    else:
+        keep = rows
+        for column in block:
+            column[: len(rows)] = column[rows]
+        kept = block[:, : len(rows)]
+    feat = pd.DataFrame(kept.T, columns=block_names, copy=False)
+    for loc, c in enumerate(df.columns):
+        if c != "value":
+            feat.insert(loc, c, df[c].array[keep])
+    return feat
+
+
+def warmupRows(lags: list[int], windows: list[int], extra: list[str] = ()) -> int:
+    """
+    Number of observations needed before a row for all its features to exist.
+
+    A lag k reads the return k steps back, which needs price[t - k - 1]; a
+    rolling window w reads returns t-w+1..t, which needs price[t - w]. Extra
+    features need their window, or for EWMA enough half-lives of history
+    that older observations no longer change the value (see
+    feature_registry.contextRows).
+    """
+    return max([lag + 1 for lag in lags] + list(windows) + [contextRows(extra)])
+
+
+def readWarmWindow(
+    db_path: str,
+    in_table: str,
+    series_id: str,
+    warmup: int,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    lookahead_rows: int = 1,
+    backend: str = "sqlite",
+) -> pd.DataFrame:
+    """
+    Read the observations in [start, end] plus at least `warmup` valid
+    (positive) observations before `start` and `lookahead_rows` valid ones
+    after `end`.
+
+    Each side is first read as that many rows; if some are missing or
+    non-positive (which buildFeatureMatrix drops), more are read until
+    enough valid ones precede `start` and follow `end`, or the history runs
+    out on that side.
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns ["date", "value"] sorted by date.
+    """
+    warmup_rows, ahead_rows = warmup, lookahead_rows
+    while True:
+        df = readSeriesWindow(
+            db_path,
+            in_table,
+            series_id,
+            start=start,
+            end=end,
+            warmup_rows=warmup_rows,
+            lookahead_rows=ahead_rows,
+            backend=backend,
+        )
+        dates, values = df["date"].to_numpy(), df["value"].to_numpy()
+        missing_before = missing_after = 0
+        if start is not None:
+            context = values[dates < np.datetime64(pd.Timestamp(start))]
+            if len(context) >= warmup_rows:
+                missing_before = max(0, warmup - int(np.count_nonzero(context > 0)))
+        if end is not None:
+            context = values[dates > np.datetime64(pd.Timestamp(end))]
+            if len(context) >= ahead_rows:
+                missing_after = max(0, lookahead_rows - int(np.count_nonzero(context > 0)))
+        if not missing_before and not missing_after:
+            return df
+        warmup_rows += missing_before
+        ahead_rows += missing_after
+
+
+def computeFeatures(
+    db_path: str,
+    in_table: str,
+    series_id: str,
+    lags: list[int],
+    windows: list[int],
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    backend: str = "sqlite",
+    compact: bool = False,
+    extra: list[str] = (),
+) -> pd.DataFrame:
+    """
+    Read the observations a date range needs and build its feature rows.
+
+    Only the date and value columns in [start, end] are read, plus the
+    warm-up rows the largest lag/window needs and the first valid row after
+    `end` for the target (see readWarmWindow), so the rows match those of a
+    full-history build.
+
+    Returns
+    -------
+    pd.DataFrame
+        Feature rows dated within [start, end].
+    """
+    warmup = warmupRows(lags, windows, extra)
+    df = readWarmWindow(db_path, in_table, series_id, warmup, start=start, end=end, backend=backend)
+    feat = buildFeatureMatrix(df, lags=lags, windows=windows, compact=compact, extra=extra)
+    if start is not None:
+        feat = feat[feat["date"] >= pd.Timestamp(start)]
+    if end is not None:
+        feat = feat[feat["date"] <= pd.Timestamp(end)]
+    return feat.reset_index(drop=True)
+
+
+def iterFeatureChunks(
+    db_path: str,
+    in_table: str,
+    series_id: str,
+    lags: list[int],
+    windows: list[int],
+    chunk_rows: int = STREAM_CHUNK_ROWS,
+    backend: str = "sqlite",
+    compact: bool = False,
+    extra: list[str] = (),
+) -> Iterator[pd.DataFrame]:
+    """
+    Build the full-history feature matrix of one series chunk by chunk.
+
+    Observations are read in date order `chunk_rows` at a time (see
+    store_sqlite.iterSeriesChunks). The state carried across a chunk boundary
+    is the last `warmupRows + 1` valid observations: enough context for every
+    lag and window of the next chunk's rows, plus the previous chunk's last
+    row, which is emitted once the next observation provides its target.
+    Peak memory is therefore bounded by the chunk size, not the history.
+
+    The rows, columns and dates match buildFeatureMatrix over the whole
+    series; rolling statistics may differ in the last bits, as with
+    appendFeatures.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive, date-sorted blocks of feature rows (possibly empty; at
+        least one block, even for a series without observations).
+    """
+    carry_rows = warmupRows(lags, windows, extra) + 1
+    context = None
+    last_date = None
+    chunks = iterSeriesChunks(db_path, in_table, series_id, chunk_rows=chunk_rows, backend=backend)
+    empty = pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "value": pd.Series(dtype=np.float64)})
+    for chunk in chunks:
+        chunk = chunk[chunk["value"] > 0]
+        df = chunk if context is None else pd.concat([context, chunk], ignore_index=True)
+        feat = buildFeatureMatrix(df, lags=lags, windows=windows, compact=compact, extra=extra)
+        if last_date is not None:
+            feat = feat[feat["date"] > last_date]
+        if len(feat):
+            last_date = feat["date"].iloc[-1]
+        context = df.iloc[-carry_rows:].reset_index(drop=True)
+        yield feat.reset_index(drop=True)
+    if context is None:
+        yield buildFeatureMatrix(empty, lags=lags, windows=windows, compact=compact, extra=extra)
+
+
+def writeFeatureChunks(
+    chunks: Iterable[pd.DataFrame], out_path: str, series_id: str | None = None, dtype: str = "float64"
+) -> int:
+    """
+    Write feature blocks (e.g., from iterFeatureChunks) to a feature store or
+    CSV as they arrive, holding one block in memory at a time.
+
+    The first block creates the output and later ones are appended (see
+    feature_store.appendFeatureStore), all under a temporary path that
+    replaces `out_path` once every block is written.
 
-    df["log_price"] = np.log(df["value"].astype(float))
-    df["log_return"] = df["log_price"].diff()
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    tmp_path = f"{out_path.rstrip(os.sep)}.tmp"
+    n_rows = 0
+    for i, feat in enumerate(chunks):
+        if not isFeatureStore(out_path):
+            feat.to_csv(tmp_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        elif i == 0:
+            writeFeatureStore(feat, tmp_path, series_id=series_id, dtype=dtype)
+        else:
+            appendFeatureStore(feat, tmp_path, series_id=series_id)
+        n_rows += len(feat)
 
-    for lag in lags:
-        df[f"r_lag_{lag}"] = df["log_return"].shift(lag)
+    if isFeatureStore(out_path):
+        replaceDir(tmp_path, out_path)
+    else:
+        os.replace(tmp_path, out_path)
+    return n_rows
 
-    for w in windows:
-        df[f"r_roll_mean_{w}"] = df["log_return"].rolling(window=w).mean()
-        df[f"r_roll_std_{w}"] = df["log_return"].rolling(window=w).std()
 
-    df["y_next_return"] = df["log_return"].shift(-1)
+def appendFeatures(
+    db_path: str,
+    in_table: str,
+    out_path: str,
+    series_id: str,
+    lags: list[int],
+    windows: list[int],
+    backend: str = "sqlite",
+    extra: list[str] = (),
+) -> int:
+    """
+    Compute features only for observations after the last row of a feature
+    store and append them to it.
+
+    The read covers the warm-up context of the largest lag/window plus the
+    new observations, so the cost does not grow with the history. Revisions
+    of observations that already have feature rows are not picked up; run a
+    full rebuild for those.
+
+    Returns
+    -------
+    int
+        Number of rows appended.
+    """
+    dates, X = readFeatureStore(out_path)[:2] if os.path.isdir(out_path) else ([], None)
+    start = pd.Timestamp(dates[-1]) + pd.Timedelta(seconds=1) if len(dates) else None
+    compact = X is not None and X.dtype == np.float32
+    feat = computeFeatures(
+        db_path, in_table, series_id, lags, windows, start=start, backend=backend, compact=compact, extra=extra
+    )
+    return appendFeatureStore(feat, out_path, series_id=series_id)
+
+
+def verifyFeatureStore(
+    db_path: str,
+    in_table: str,
+    out_path: str,
+    series_id: str,
+    lags: list[int],
+    windows: list[int],
+    backend: str = "sqlite",
+    rtol: float = VERIFY_RTOL,
+    atol: float = VERIFY_ATOL,
+    extra: list[str] = (),
+) -> None:
+    """
+    Check a feature store against a full rebuild from the database.
+
+    Dates and feature names must match exactly. Values must agree to within
+    rtol/atol: rolling statistics started from a shorter history sum in a
+    different order, so they can differ in the last bits. A float32 store is
+    compared with the rebuild rounded to float32, to within a few float32
+    ulps.
+
+    Raises
+    ------
+    ValueError
+        If the store and the rebuild differ.
+    """
+    full = computeFeatures(db_path, in_table, series_id, lags, windows, backend=backend, extra=extra)
+    dates, X, y, feature_cols = readFeatureStore(out_path)
+    expected_cols = featureColumns(full.columns)
+    if feature_cols != expected_cols:
+        raise ValueError(f"Feature columns {feature_cols} differ from a full rebuild's {expected_cols}")
+    if not np.array_equal(dates, full["date"].to_numpy(dtype="datetime64[ns]")):
+        raise ValueError(f"Feature store dates differ from a full rebuild ({len(dates):,} vs {len(full):,} rows)")
+    for name, stored, rebuilt in (("X", X, full[expected_cols].to_numpy()), ("y", y, full[TARGET].to_numpy())):
+        rebuilt = rebuilt.astype(stored.dtype)
+        eps = 4 * float(np.finfo(stored.dtype).eps)
+        if not np.allclose(stored, rebuilt, rtol=max(rtol, eps), atol=atol):
+            worst = float(np.max(np.abs(stored - rebuilt)))
+            raise ValueError(f"Feature store {name} differs from a full rebuild (max abs diff {worst:.3g})")
+    print(f"Verified features: {len(dates):,} rows match a full rebuild")
+
+
+def writeFloat64Reference(
+    db_path: str,
+    in_table: str,
+    out_path: str,
+    series_id: str,
+    lags: list[int],
+    windows: list[int],
+    test_size: float,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    backend: str = "sqlite",
+    extra: list[str] = (),
+) -> dict:
+    """
+    Record the baseline model's metrics on float64 features in a compact store.
+
+    The float64 feature matrix for the store's rows is rebuilt from the
+    database and scored with train_eval's Ridge baseline and time split. The
+    MAE/RMSE are saved as "float64_reference" in the store's meta.json, so
+    train_eval.py can measure how far the float32 features move the metrics
+    without keeping a float64 copy. A reference that already matches the
+    store's rows and test_size is kept.
+
+    Returns
+    -------
+    dict
+        The reference: {"test_size", "n_rows", "mae", "rmse"}.
+    """
+    meta = readMeta(out_path)
+    reference = meta.get("float64_reference")
+    if reference is not None and reference["test_size"] == test_size and reference["n_rows"] == meta["n_rows"]:
+        return reference
+
+    full = computeFeatures(db_path, in_table, series_id, lags, windows, start=start, end=end, backend=backend, extra=extra)
+    if len(full) != meta["n_rows"]:
+        raise ValueError(f"Float64 rebuild has {len(full):,} rows, the feature store {meta['n_rows']:,}")
+    X = full[meta["feature_cols"]].to_numpy(dtype=np.float64)
+    y = full[TARGET].to_numpy(dtype=np.float64)
+    n_train = splitIndex(len(y), test_size)
+    _, _, mae, rmse = fitRidge(X[:n_train], y[:n_train], X[n_train:], y[n_train:])
 
-    df = df.dropna().reset_index(drop=True)
-    return df
+    reference = {"test_size": test_size, "n_rows": int(len(y)), "mae": mae, "rmse": rmse}
+    meta["float64_reference"] = reference
+    writeMeta(out_path, meta)
+    print(f"Float64 features: {full.memory_usage(index=False, deep=True).sum() / 2**20:.2f} MB measured")
+    print(f"Wrote float64 reference metrics (MAE={mae:.6f} RMSE={rmse:.6f}) -> {out_path}")
+    return reference
 
 
-def main(db_path: str, in_table: str, out_csv: str, lags: list[int], windows: list[int]) -> None:
+def main(
+    db_path: str,
+    in_table: str,
+    out_path: str,
+    lags: list[int],
+    windows: list[int],
+    series_id: str | None = None,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    backend: str = "sqlite",
+    append: bool = False,
+    verify: bool = False,
+    cache_dir: str | None = None,
+    cache_max_bytes: int = FEATURE_CACHE_MAX_BYTES,
+    series_table: str = SERIES_TABLE,
+    dtype: str = "float64",
+    chunk_rows: int | None = None,
+    extra: list[str] = (),
+    reference_test_size: float | None = None,
+) -> None:
     """
-    Read a time series from SQLite, build features/target, and write a model-ready CSV.
+    Read a time series from the database, build features/target, and write a model-ready dataset.
 
     Parameters
     ----------
     db_path:
-        Path to the SQLite database.
+        Path to the database file.
     in_table:
-        Name of the table to read (must contain date, value).
-    out_csv:
-        Output CSV path for the engineered dataset.
+        Name of the long-format observations table (series_id, date, value).
+    out_path:
+        Output feature store directory (typed .npy arrays plus metadata, see
+        feature_store.writeFeatureStore), or a path ending in .csv for CSV.
     lags:
         List of lag steps used for lagged-return features.
     windows:
         List of rolling window sizes used for rolling statistics features.
+    series_id:
+        Series to select. May be omitted only if the table holds a single series.
+    start, end:
+        Optional inclusive date range of feature rows to produce (see
+        computeFeatures), so refreshing a recent window reads the same amount
+        as history grows.
+    backend:
+        Storage backend of db_path ("sqlite" or "duckdb").
+    append:
+        If True, only compute rows newer than the feature store's last row
+        and append them (see appendFeatures).
+    verify:
+        If True, check the written feature store against a full rebuild (see
+        verifyFeatureStore).
+    cache_dir:
+        Optional feature matrix cache (see feature_cache). A full build into
+        a feature store is keyed by the series' content hash, the sorted
+        lags/windows and the feature code version; a hit copies the cached
+        store without reading observations or computing anything. Column
+        order follows the run that filled the entry.
+    cache_max_bytes:
+        Size bound of the cache; least recently used entries are evicted.
+    series_table:
+        Series metadata table holding the content hashes.
+    dtype:
+        "float64", or "float32" for compact mode: features and target are
+        built as one float32 block without intermediate columns (see
+        buildFeatureMatrix) and stored as float32. The memory of the feature
+        frame is reported. An append keeps the existing store's dtype.
+    chunk_rows:
+        If set, a full build streams the series through the feature engine
+        this many observations at a time (see iterFeatureChunks and
+        writeFeatureChunks), so memory stays bounded for very long series.
+    extra:
+        Optional extra features (see feature_registry.extraFeatureNames),
+        added after the rolling statistics.
+    reference_test_size:
+        For a float32 feature store: also score the baseline model on the
+        float64 features with this test fraction and record the metrics in the
+        store (see writeFloat64Reference), for train_eval.py --max-metric-drift.
     """
-    engine = create_engine(f"sqlite:///{db_path}")
-    df = pd.read_sql_table(in_table, engine)
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"dtype must be one of {STORE_DTYPES}. Got: {dtype!r}")
+    if series_id is None:
+        series_id = onlySeriesId(db_path, in_table, backend=backend)
 
-    required = {"date", "value"}
-    if not required.issubset(df.columns):
-        raise ValueError(f"Table {in_table} must contain {required}. Got: {df.columns.tolist()}")
+    dirname = os.path.dirname(out_path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    cache_key = cached = None
+    if append:
+        n_rows = appendFeatures(db_path, in_table, out_path, series_id, lags, windows, backend=backend, extra=extra)
+        print(f"Appended features: {n_rows:,} rows -> {out_path}")
+    else:
+        if cache_dir is not None and start is None and end is None and isFeatureStore(out_path):
+            content_hash, _ = readContentState(db_path, series_id, series_table=series_table, backend=backend)
+            if content_hash is not None:
+                cache_key = featureCacheKey(content_hash, series_id, lags, windows, dtype=dtype, extra=extra)
 
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"]).copy()
+        cached = None if cache_key is None else lookupFeatureCache(cache_dir, cache_key)
+        if cached is not None:
+            copyFeatureStore(cached, out_path)
+            print(f"Reused cached features {cache_key} -> {out_path}")
+        elif chunk_rows is not None and start is None and end is None:
+            chunks = iterFeatureChunks(
+                db_path,
+                in_table,
+                series_id,
+                lags,
+                windows,
+                chunk_rows=chunk_rows,
+                backend=backend,
+                compact=dtype == "float32",
+                extra=extra,
+            )
+            n_rows = writeFeatureChunks(chunks, out_path, series_id=series_id, dtype=dtype)
+            print(f"Wrote features: {n_rows:,} rows in chunks of {chunk_rows:,} observations -> {out_path}")
+        else:
+            compact = dtype == "float32"
+            feat = computeFeatures(
+                db_path,
+                in_table,
+                series_id,
+                lags,
+                windows,
+                start=start,
+                end=end,
+                backend=backend,
+                compact=compact,
+                extra=extra,
+            )
+            if compact:
+                # Estimate only: building the float64 frame just to measure it would defeat compact mode.
+                n_float64 = len(featureColumns(feat.columns)) + 4  # + value, log_price, log_return, target
+                estimate = len(feat) * (n_float64 + 1) * 8
+                after = int(feat.memory_usage(index=False, deep=True).sum())
+                print(
+                    f"Compact features: {after / 2**20:.2f} MB measured "
+                    f"(float64 with intermediates: ~{estimate / 2**20:.2f} MB estimated as rows x columns x 8 bytes)"
+                )
+            if isFeatureStore(out_path):
+                writeFeatureStore(feat, out_path, series_id=series_id, dtype=dtype)
+            else:
+                feat.to_csv(out_path, index=False)
+            print(f"Wrote features: {len(feat):,} rows -> {out_path}")
 
-    feat = buildFeatureMatrix(df, lags=lags, windows=windows)
+    if reference_test_size is not None and isFeatureStore(out_path) and readMeta(out_path).get("dtype") == "float32":
+        writeFloat64Reference(
+            db_path,
+            in_table,
+            out_path,
+            series_id,
+            lags,
+            windows,
+            reference_test_size,
+            start=start,
+            end=end,
+            backend=backend,
+            extra=extra,
+        )
+    if cached is None and cache_key is not None:
+        storeFeatureCache(cache_dir, cache_key, out_path, max_bytes=cache_max_bytes)
 
-    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
-    feat.to_csv(out_csv, index=False)
-    print(f"Wrote features: {len(feat):,} rows -> {out_csv}")
+    if verify:
+        verifyFeatureStore(db_path, in_table, out_path, series_id, lags, windows, backend=backend, extra=extra)
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--db-path", required=True)
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite", help="Storage backend of --db-path")
     parser.add_argument("--in-table", required=True)
-    parser.add_argument("--out-csv", required=True)
+    parser.add_argument(
+        "--out",
+        "--out-csv",
+        dest="out",
+        required=True,
+        help="Feature store directory (or a path ending in .csv)",
+    )
     parser.add_argument("--lags", required=True, help="Comma-separated list, e.g. 1,3,6,12")
     parser.add_argument("--windows", required=True, help="Comma-separated list, e.g. 3,6,12")
+    parser.add_argument("--series-id", help="Series to select from a multi-series table")
+    parser.add_argument("--start", help="First date of feature rows to produce, e.g. 2024-01-01")
+    parser.add_argument("--end", help="Last date of feature rows to produce")
+    parser.add_argument("--append", action="store_true", help="Only append rows newer than the feature store's last row")
+    parser.add_argument("--verify", action="store_true", help="Check the feature store against a full rebuild")
+    parser.add_argument("--cache-dir", help="Feature matrix cache keyed by content hash, lags, windows and code version")
+    parser.add_argument("--cache-max-mb", type=float, default=FEATURE_CACHE_MAX_BYTES / 2**20, help="Cache size bound")
+    parser.add_argument("--series-table", default=SERIES_TABLE, help="Series metadata table")
+    parser.add_argument(
+        "--dtype", choices=STORE_DTYPES, default="float64", help="float32: compact feature matrix and store"
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, help="Stream a full build through the feature engine this many observations at a time"
+    )
+    addExtraArgs(parser)
+    parser.add_argument(
+        "--reference-test-size",
+        type=float,
+        help="float32 store: record the baseline's float64 metrics for this test fraction",
+    )
     args = parser.parse_args()
+    if args.append and (args.start or args.end):
+        parser.error("--append cannot be combined with --start/--end")
+    if args.chunk_rows is not None and (args.append or args.start or args.end):
+        parser.error("--chunk-rows applies to full builds only, not --append/--start/--end")
+    if (args.append or args.verify) and not isFeatureStore(args.out):
+        parser.error("--append/--verify need a feature store directory for --out")
 
     lags = [int(x.strip()) for x in args.lags.split(",") if x.strip()]
     windows = [int(x.strip()) for x in args.windows.split(",") if x.strip()]
-    main(args.db_path, args.in_table, args.out_csv, lags, windows)
+    extra = parseExtraArgs(args, parser)
+    main(
+        args.db_path,
+        args.in_table,
+        args.out,
+        lags,
+        windows,
+        series_id=args.series_id,
+        start=args.start,
+        end=args.end,
+        backend=args.backend,
+        append=args.append,
+        verify=args.verify,
+        cache_dir=args.cache_dir,
+        cache_max_bytes=int(args.cache_max_mb * 2**20),
+        series_table=args.series_table,
+        dtype=args.dtype,
+        chunk_rows=args.chunk_rows,
+        extra=extra,
+        reference_test_size=args.reference_test_size,
+    )
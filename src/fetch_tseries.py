@@ -1,16 +1,315 @@
 from __future__ import annotations
 
 import argparse
+import json
 import os
-from io import StringIO
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+from ratelimit import TokenBucket, callWithRetry
+from series_io import writeSeriesFile
+from store_sqlite import (
+    BACKENDS,
+    SERIES_TABLE,
+    bulkLoadSeries,
+    lastStoredDate,
+    readContentState,
+    seriesContentHash,
+    upsertSeries,
+)
 
 FRED_CSV_URL = "https://fred.stlouisfed.org/graph/fredgraph.csv?id={series_id}"
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CHUNK_BYTES = 64 * 1024
+DEFAULT_CHUNK_ROWS = 65_536
+DEFAULT_TIMEOUT_S = 30.0
+DEFAULT_RATE_PER_S = 5.0
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_DEADLINE_S = 120.0
+
+
+def makeSession(pool_size: int = DEFAULT_MAX_WORKERS) -> requests.Session:
+    """
+    Create a keep-alive HTTP session sized for concurrent FRED requests.
+
+    Parameters
+    ----------
+    pool_size:
+        Maximum number of pooled connections to the FRED host. Should be at
+        least the number of worker threads sharing the session.
+
+    Returns
+    -------
+    requests.Session
+        A session whose connections are reused across requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def readCachedValidators(cache_dir: str, series_id: str) -> dict | None:
+    """
+    Load the cached ETag/Last-Modified validators for a series.
+
+    Returns
+    -------
+    dict | None
+        The stored validators, or None if the series (validators and payload)
+        has not been cached yet.
+    """
+    meta_path = os.path.join(cache_dir, f"{series_id}.json")
+    body_path = os.path.join(cache_dir, f"{series_id}.csv")
+    if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+        return None
+
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iterCachedLines(cache_dir: str, series_id: str) -> Iterator[str]:
+    """
+    Replay a cached FRED CSV payload line by line.
+    """
+    with open(os.path.join(cache_dir, f"{series_id}.csv"), "r", encoding="utf-8") as f:
+        for line in f:
+            yield line.rstrip("\r\n")
+
+
+def iterResponseLines(response: requests.Response, chunk_size: int = DEFAULT_CHUNK_BYTES) -> Iterator[str]:
+    """
+    Yield the lines of a streamed response, reading it in fixed-size chunks.
+    The response is closed once the body is exhausted or the iterator is dropped.
+    """
+    if response.encoding is None:
+        response.encoding = "utf-8"
+    try:
+        for line in response.iter_lines(chunk_size=chunk_size, decode_unicode=True):
+            yield line.rstrip("\r")
+    finally:
+        response.close()
+
+
+def teeLinesToCache(lines: Iterator[str], cache_dir: str, series_id: str, validators: dict) -> Iterator[str]:
+    """
+    Pass lines through while copying them into the response cache.
+
+    The cache entry is only replaced once the whole body has been consumed, and
+    the payload is written before the validators so an interrupted download
+    never pairs new validators with a stale body.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path = os.path.join(cache_dir, f"{series_id}.csv")
+    meta_path = os.path.join(cache_dir, f"{series_id}.json")
+
+    with open(f"{body_path}.tmp", "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+            yield line
+    os.replace(f"{body_path}.tmp", body_path)
+
+    with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(validators, f, indent=2)
+    os.replace(f"{meta_path}.tmp", meta_path)
+
+
+def requestFredCsv(
+    series_id: str,
+    session: requests.Session | None = None,
+    observation_start: pd.Timestamp | None = None,
+    cache_dir: str | None = None,
+    timeout: float = DEFAULT_TIMEOUT_S,
+) -> tuple[Iterator[str], bool]:
+    """
+    Open the raw FRED CSV for a series as a lazy stream of lines.
+
+    The body is requested with `stream=True` and read in chunks, so it is never
+    held in memory as a whole. With a cache directory, the stored ETag and
+    Last-Modified validators are sent as If-None-Match/If-Modified-Since; a 304
+    response replays the cached body, and a 200 body is copied into the cache
+    as it is consumed. Only full-history requests are cached.
+
+    Parameters
+    ----------
+    series_id:
+        FRED series identifier.
+    session:
+        Optional shared session.
+    observation_start:
+        Optional first date to request (FRED's "cosd" parameter on the CSV endpoint).
+    cache_dir:
+        Optional directory for the persistent response cache.
+    timeout:
+        Connect/read timeout in seconds.
+
+    Returns
+    -------
+    (lines, modified):
+        An iterator over the CSV lines (header first), and False if the server
+        reported the series unchanged since the cached copy (HTTP 304). Nothing
+        is read until the iterator is consumed.
+
+    Raises
+    ------
+    requests.HTTPError
+        If the FRED endpoint returns an error status code.
+    """
+    url = FRED_CSV_URL.format(series_id=series_id)
+    if observation_start is not None:
+        url += f"&cosd={pd.Timestamp(observation_start):%Y-%m-%d}"
+
+    use_cache = cache_dir is not None and observation_start is None
+    cached = readCachedValidators(cache_dir, series_id) if use_cache else None
+
+    headers = {}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    http = session if session is not None else requests
+    response = http.get(url, headers=headers, timeout=timeout, stream=True)
+    if response.status_code == 304 and cached is not None:
+        response.close()
+        return iterCachedLines(cache_dir, series_id), False
+    if not response.ok:
+        response.close()
+    response.raise_for_status()
+
+    lines = iterResponseLines(response)
+    if use_cache:
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        lines = teeLinesToCache(lines, cache_dir, series_id, validators)
+    return lines, True
+
+
+def parseFredCsvLines(
+    lines: Iterable[str], series_id: str, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parse FRED CSV lines incrementally into typed NumPy arrays.
+
+    Lines are converted in blocks of `chunk_rows`, so only one block of text is
+    alive at a time; peak memory stays close to the size of the final arrays.
+
+    Parameters
+    ----------
+    lines:
+        CSV lines, header first (e.g., from requestFredCsv).
+    series_id:
+        FRED series identifier (used in error messages).
+    chunk_rows:
+        Number of lines converted per block.
+
+    Returns
+    -------
+    (dates, values):
+        dates as datetime64[ns] and values as float64, in file order. Missing
+        values (FRED's ".") are NaN.
+
+    Raises
+    ------
+    ValueError
+        If the CSV does not have the expected two-column format.
+    """
+    it = iter(lines)
+    header = next(it, "")
+    if header.count(",") != 1:
+        raise ValueError(f"Unexpected CSV format for {series_id}. Columns: {header.split(',')}")
+
+    date_blocks: list[np.ndarray] = []
+    value_blocks: list[np.ndarray] = []
+    date_buf: list[str] = []
+    value_buf: list[str] = []
+
+    def flush() -> None:
+        date_blocks.append(np.array(date_buf, dtype="datetime64[ns]"))
+        value_blocks.append(np.asarray(pd.to_numeric(value_buf, errors="coerce"), dtype=np.float64))
+        date_buf.clear()
+        value_buf.clear()
+
+    for line in it:
+        if not line:
+            continue
+        date_str, _, value_str = line.partition(",")
+        date_buf.append(date_str)
+        value_buf.append(value_str)
+        if len(date_buf) >= chunk_rows:
+            flush()
+    if date_buf or not date_blocks:
+        flush()
+
+    if len(date_blocks) == 1:
+        return date_blocks[0], value_blocks[0]
+    return np.concatenate(date_blocks), np.concatenate(value_blocks)
+
+
+def cleanFredArrays(
+    dates: np.ndarray, values: np.ndarray, observation_start: pd.Timestamp | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Drop missing values, sort by date and apply an optional start date.
+    Arrays that are already clean are returned without copying.
+    """
+    keep = ~(np.isnan(values) | np.isnat(dates))
+    if observation_start is not None:
+        keep &= dates >= np.datetime64(pd.Timestamp(observation_start), "ns")
+    if not keep.all():
+        dates, values = dates[keep], values[keep]
+
+    if len(dates) > 1 and not (dates[1:] >= dates[:-1]).all():
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+    return dates, values
+
+
+def fetchFredArrays(
+    series_id: str,
+    session: requests.Session | None = None,
+    observation_start: pd.Timestamp | None = None,
+    cache_dir: str | None = None,
+    timeout: float = DEFAULT_TIMEOUT_S,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fetch a FRED series straight into (dates, values) NumPy arrays.
+
+    The response is streamed and parsed incrementally; see fetchFredSeries for
+    the parameters. Returns datetime64[ns] dates and float64 values, cleaned
+    and sorted by date.
+    """
+    lines, _ = requestFredCsv(
+        series_id, session=session, observation_start=observation_start, cache_dir=cache_dir, timeout=timeout
+    )
+    dates, values = parseFredCsvLines(lines, series_id)
+    return cleanFredArrays(dates, values, observation_start=observation_start)
 
 
-def fetchFredSeries(series_id: str) -> pd.DataFrame:
+def arraysToFrame(dates: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    """
+    Wrap (dates, values) arrays in a (date, value) DataFrame without copying.
+    """
+    return pd.DataFrame({"date": dates, "value": values}, copy=False)
+
+
+def fetchFredSeries(
+    series_id: str,
+    session: requests.Session | None = None,
+    observation_start: pd.Timestamp | None = None,
+    cache_dir: str | None = None,
+    timeout: float = DEFAULT_TIMEOUT_S,
+) -> pd.DataFrame:
     """
     Fetch a time series from FRED and return it as a cleaned DataFrame.
 
@@ -18,6 +317,16 @@ def fetchFredSeries(series_id: str) -> pd.DataFrame:
     ----------
     series_id:
         FRED series identifier (e.g., "PCOFFOTMUSDM").
+    session:
+        Optional shared session. When omitted, a one-off connection is used.
+    observation_start:
+        Optional first date to request (FRED's "cosd" parameter on the CSV
+        endpoint). When omitted, the full history is downloaded.
+    cache_dir:
+        Optional persistent response cache; unchanged series are served from it
+        after a conditional request.
+    timeout:
+        Connect/read timeout in seconds.
 
     Returns
     -------
@@ -34,36 +343,461 @@ def fetchFredSeries(series_id: str) -> pd.DataFrame:
     ValueError
         If the returned CSV does not have the expected two-column format.
     """
-    url = FRED_CSV_URL.format(series_id=series_id)
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
+    dates, values = fetchFredArrays(
+        series_id, session=session, observation_start=observation_start, cache_dir=cache_dir, timeout=timeout
+    )
+    return arraysToFrame(dates, values)
+
+
+def fetchFredSeriesIfModified(
+    series_id: str, cache_dir: str, session: requests.Session | None = None, timeout: float = DEFAULT_TIMEOUT_S
+) -> pd.DataFrame | None:
+    """
+    Fetch a FRED series only if it changed since the cached copy.
+
+    Returns
+    -------
+    pd.DataFrame | None
+        The parsed series, or None if FRED answered 304 Not Modified (in which
+        case the body is not parsed at all).
+    """
+    lines, modified = requestFredCsv(series_id, session=session, cache_dir=cache_dir, timeout=timeout)
+    if not modified:
+        return None
+    return arraysToFrame(*cleanFredArrays(*parseFredCsvLines(lines, series_id)))
+
+
+def fetchManySeries(
+    series_ids: list[str],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    cache_dir: str | None = None,
+    rate: float = DEFAULT_RATE_PER_S,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    deadline_s: float | None = DEFAULT_DEADLINE_S,
+    existing: Iterable[str] = (),
+) -> tuple[dict[str, pd.DataFrame], dict[str, dict]]:
+    """
+    Fetch several FRED series concurrently over one pooled session.
+
+    Requests are paced by a shared token bucket, retried with jittered
+    exponential backoff on throttling (429), server errors (5xx) and dropped
+    connections, and bounded by a per-series deadline. A series that fails is
+    recorded in the report instead of aborting the batch.
+
+    Parameters
+    ----------
+    series_ids:
+        FRED series identifiers. Duplicates are fetched once.
+    max_workers:
+        Size of the thread pool (and of the session's connection pool).
+    cache_dir:
+        Optional persistent response cache shared by all series.
+    rate:
+        Maximum number of requests started per second across all workers.
+    max_retries:
+        Retries per series after the first attempt.
+    deadline_s:
+        Time budget per series in seconds (including backoff), or None.
+    existing:
+        Series IDs that already have a local copy. With a cache directory they
+        are requested conditionally, and a 304 answer is neither parsed nor
+        returned in frames.
+
+    Returns
+    -------
+    (frames, report):
+        frames maps each fetched and modified series ID to its DataFrame (as
+        returned by fetchFredSeries), in the order given. report maps every
+        series ID to {"ok", "modified", "rows", "seconds", "attempts", "error"}.
+    """
+    unique_ids = list(dict.fromkeys(series_ids))
+    conditional = set(existing) if cache_dir is not None else set()
+    bucket = TokenBucket(rate)
+    frames: dict[str, pd.DataFrame] = {}
+    report: dict[str, dict] = {}
+
+    def scheduledFetch(series_id: str, session: requests.Session) -> tuple[pd.DataFrame | None, dict]:
+        start = time.perf_counter()
+        if series_id in conditional:
+            fetch = lambda timeout: fetchFredSeriesIfModified(series_id, cache_dir, session=session, timeout=timeout)
+        else:
+            fetch = lambda timeout: fetchFredSeries(series_id, session=session, cache_dir=cache_dir, timeout=timeout)
+        try:
+            df, attempts = callWithRetry(
+                fetch,
+                bucket=bucket,
+                max_retries=max_retries,
+                deadline_s=deadline_s,
+                timeout_s=DEFAULT_TIMEOUT_S,
+            )
+        except Exception as exc:
+            entry = {
+                "ok": False,
+                "modified": False,
+                "rows": 0,
+                "attempts": getattr(exc, "attempts", 1),
+                "error": str(exc),
+            }
+            return None, {**entry, "seconds": time.perf_counter() - start}
+        rows = 0 if df is None else len(df)
+        entry = {"ok": True, "modified": df is not None, "rows": rows, "attempts": attempts, "error": None}
+        return df, {**entry, "seconds": time.perf_counter() - start}
+
+    with makeSession(pool_size=max_workers) as session:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(scheduledFetch, sid, session): sid for sid in unique_ids}
+            for future in as_completed(futures):
+                sid = futures[future]
+                df, report[sid] = future.result()
+                if df is not None:
+                    frames[sid] = df
+
+    frames = {sid: frames[sid] for sid in unique_ids if sid in frames}
+    report = {sid: report[sid] for sid in unique_ids}
+    return frames, report
+
+
+def fetchNewObservations(
+    series_id: str,
+    db_path: str,
+    table_name: str,
+    session: requests.Session | None = None,
+    timeout: float = DEFAULT_TIMEOUT_S,
+    backend: str = "sqlite",
+) -> pd.DataFrame:
+    """
+    Fetch only the observations newer than the last date stored in the database.
+
+    Parameters
+    ----------
+    series_id:
+        FRED series identifier.
+    db_path:
+        Path to the database holding previously stored observations.
+    table_name:
+        Observations table holding the series (series_id, date, value).
+    session:
+        Optional shared session.
+    timeout:
+        Connect/read timeout in seconds.
+    backend:
+        Storage backend of db_path ("sqlite" or "duckdb").
 
-    df = pd.read_csv(StringIO(response.text))
-    if df.shape[1] != 2:
-        raise ValueError(f"Unexpected CSV format for {series_id}. Columns: {df.columns.tolist()}")
+    Returns
+    -------
+    pd.DataFrame
+        Observations strictly after the last stored date (possibly empty), or
+        the full history if nothing is stored yet.
+    """
+    last_date = lastStoredDate(db_path, table_name, series_id=series_id, backend=backend)
+    if last_date is None:
+        return fetchFredSeries(series_id, session=session, timeout=timeout)
 
-    df.columns = ["date", "value"]
-    df["date"] = pd.to_datetime(df["date"])
-    df["value"] = pd.to_numeric(df["value"], errors="coerce")
-    df = df.dropna().sort_values("date").reset_index(drop=True)
-    return df
+    df = fetchFredSeries(
+        series_id, session=session, observation_start=last_date + pd.Timedelta(days=1), timeout=timeout
+    )
+    return df[df["date"] > last_date].reset_index(drop=True)
 
 
-def writeSeriesToCsv(series_id: str, out_csv: str) -> None:
+def writeSeries(
+    series_id: str,
+    out_path: str,
+    cache_dir: str | None = None,
+    compression: str | None = None,
+) -> None:
     """
-    Fetch a FRED series and write it to a local CSV file.
+    Fetch a FRED series and write it to a local raw file.
 
     Parameters
     ----------
     series_id:
         FRED series identifier.
-    out_csv:
-        Output path (e.g., "data/raw/coffee.csv").
+    out_path:
+        Output path; the format follows the extension (e.g., "data/raw/coffee.parquet",
+        ".arrow" or ".csv", see series_io.writeSeriesFile).
+    cache_dir:
+        Optional persistent response cache. If FRED reports the series unchanged
+        and out_path already exists, the file is left untouched.
+    compression:
+        Optional codec for columnar formats (e.g., "zstd").
     """
-    os.makedirs(os.path.dirname(out_csv), exist_ok=True)
-    df = fetchFredSeries(series_id)
-    df.to_csv(out_csv, index=False)
-    print(f"Wrote {len(df):,} rows -> {out_csv}")
+    if cache_dir is not None and os.path.exists(out_path):
+        df, _ = callWithRetry(lambda timeout: fetchFredSeriesIfModified(series_id, cache_dir, timeout=timeout))
+        if df is None:
+            print(f"{series_id} not modified; kept {out_path}")
+            return
+    else:
+        df, _ = callWithRetry(lambda timeout: fetchFredSeries(series_id, cache_dir=cache_dir, timeout=timeout))
+    writeSeriesFile(df, out_path, compression=compression)
+    print(f"Wrote {len(df):,} rows -> {out_path}")
+
+
+def ingestSeries(
+    series_id: str,
+    db_path: str,
+    table_name: str,
+    incremental: bool = False,
+    cache_dir: str | None = None,
+    export_path: str | None = None,
+    compression: str | None = None,
+    series_table: str = SERIES_TABLE,
+    name: str | None = None,
+    frequency: str | None = None,
+    backend: str = "sqlite",
+    hash_path: str | None = None,
+) -> None:
+    """
+    Fetch a FRED series and upsert it straight into the database in one transaction.
+
+    This replaces the ingest -> file -> store round trip: no intermediate file
+    is written or parsed back, and only one process is needed per series.
+    A full fetch whose content hash matches the stored one is not written at
+    all.
+
+    Parameters
+    ----------
+    series_id:
+        FRED series identifier.
+    db_path:
+        Path to the database file.
+    table_name:
+        Observations table keyed by (series_id, date).
+    incremental:
+        If True, fetch only observations newer than the last stored date.
+    cache_dir:
+        Optional persistent response cache. If FRED reports the series unchanged
+        and the table already holds it, nothing is written.
+    export_path:
+        Optional raw file export of the fetched rows (.parquet, .arrow or .csv).
+    compression:
+        Optional codec for a columnar export.
+    series_table:
+        Series metadata table, refreshed with the observations.
+    name, frequency:
+        Optional descriptive metadata stored in the series table.
+    backend:
+        Storage backend ("sqlite" or "duckdb").
+    hash_path:
+        Optional content-hash stamp file for make-style schedulers (see
+        writeHashStamp); it only gets a new mtime when the stored data changes.
+    """
+    stored = lastStoredDate(db_path, table_name, series_id=series_id, backend=backend) is not None
+    stored_hash, _ = readContentState(db_path, series_id, series_table=series_table, backend=backend)
+    if incremental:
+        df, _ = callWithRetry(
+            lambda timeout: fetchNewObservations(series_id, db_path, table_name, timeout=timeout, backend=backend)
+        )
+    elif cache_dir is not None and stored:
+        df, _ = callWithRetry(lambda timeout: fetchFredSeriesIfModified(series_id, cache_dir, timeout=timeout))
+    else:
+        df, _ = callWithRetry(lambda timeout: fetchFredSeries(series_id, cache_dir=cache_dir, timeout=timeout))
+
+    if df is None:
+        print(f"{series_id} not modified; kept {backend}:///{db_path} table={table_name}")
+    elif stored_hash is not None and not incremental and seriesContentHash(df) == stored_hash:
+        print(f"{series_id} content unchanged; kept {backend}:///{db_path} table={table_name}")
+    else:
+        n_changed = upsertSeries(
+            df,
+            db_path,
+            table_name,
+            series_id,
+            series_table=series_table,
+            name=name,
+            frequency=frequency,
+            backend=backend,
+        )
+        print(
+            f"Upserted {len(df):,} rows ({n_changed:,} new or changed) "
+            f"into {backend}:///{db_path} table={table_name}"
+        )
+
+        if export_path is not None:
+            writeSeriesFile(df, export_path, compression=compression)
+            print(f"Exported {len(df):,} rows -> {export_path}")
+
+    if hash_path is not None:
+        digest, changed_at = readContentState(db_path, series_id, series_table=series_table, backend=backend)
+        if digest is None:
+            raise ValueError(f"No stored observations for {series_id}; cannot write {hash_path}")
+        writeHashStamp(hash_path, digest, changed_at)
+
+
+def writeHashStamp(path: str, digest: str, changed_at: int) -> None:
+    """
+    Write a content-hash stamp file whose mtime is the time the content last changed.
+
+    Schedulers such as Snakemake compare mtimes, so downstream targets only
+    rerun when the data really changed. An up-to-date stamp is left alone; a
+    missing one (Snakemake removes outputs before a forced rerun) is restored
+    with the original mtime.
+    """
+    if os.path.exists(path) and int(os.path.getmtime(path)) == changed_at:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                return
+
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(f"{digest}\n")
+    os.utime(tmp_path, (changed_at, changed_at))
+    os.replace(tmp_path, path)
+    print(f"Wrote content hash {digest[:12]} -> {path}")
+
+
+def writeManySeries(
+    series_ids: list[str],
+    out_dir: str,
+    fmt: str = "parquet",
+    compression: str | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    cache_dir: str | None = None,
+    rate: float = DEFAULT_RATE_PER_S,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    deadline_s: float | None = DEFAULT_DEADLINE_S,
+) -> dict[str, dict]:
+    """
+    Fetch many FRED series concurrently and write one raw file per series.
+
+    Prints the latency and attempt count of every series, the total for the
+    batch, and which series failed. See fetchManySeries for the scheduling
+    parameters.
+
+    Parameters
+    ----------
+    series_ids:
+        FRED series identifiers.
+    out_dir:
+        Output directory; each series is written to "<out_dir>/<series_id>.<fmt>".
+    fmt:
+        File extension/format: "parquet", "arrow" or "csv".
+    compression:
+        Optional codec for columnar formats.
+    max_workers:
+        Number of concurrent requests.
+    cache_dir:
+        Optional persistent response cache. If FRED reports a series unchanged
+        and its output file already exists, the file is left untouched.
+
+    Returns
+    -------
+    dict
+        The per-series report from fetchManySeries.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    out_paths = {sid: os.path.join(out_dir, f"{sid}.{fmt}") for sid in series_ids}
+    start = time.perf_counter()
+    frames, report = fetchManySeries(
+        series_ids,
+        max_workers=max_workers,
+        cache_dir=cache_dir,
+        rate=rate,
+        max_retries=max_retries,
+        deadline_s=deadline_s,
+        existing=[sid for sid, path in out_paths.items() if os.path.exists(path)],
+    )
+    elapsed = time.perf_counter() - start
+
+    for series_id, entry in report.items():
+        if not entry["ok"]:
+            print(
+                f"{series_id}: FAILED after {entry['attempts']} attempt(s) "
+                f"in {entry['seconds']:.2f}s: {entry['error']}"
+            )
+            continue
+        out_path = out_paths[series_id]
+        if not entry["modified"]:
+            print(f"{series_id}: not modified in {entry['seconds']:.2f}s; kept {out_path}")
+            continue
+        writeSeriesFile(frames[series_id], out_path, compression=compression)
+        print(
+            f"{series_id}: {entry['rows']:,} rows in {entry['seconds']:.2f}s "
+            f"({entry['attempts']} attempt(s)) -> {out_path}"
+        )
+
+    failed = [sid for sid, entry in report.items() if not entry["ok"]]
+    unchanged = sum(entry["ok"] and not entry["modified"] for entry in report.values())
+    total_rows = sum(entry["rows"] for entry in report.values())
+    print(
+        f"Fetched {len(report) - len(failed):,}/{len(report):,} series ({unchanged:,} not modified, "
+        f"{total_rows:,} rows) in {elapsed:.2f}s "
+        f"with {max_workers} workers (sum of per-series latency: {sum(e['seconds'] for e in report.values()):.2f}s)"
+    )
+    if failed:
+        print(f"Failed series: {', '.join(failed)}")
+    return report
+
+
+def ingestManySeries(
+    series_ids: list[str],
+    db_path: str,
+    table_name: str,
+    series_table: str = SERIES_TABLE,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    cache_dir: str | None = None,
+    rate: float = DEFAULT_RATE_PER_S,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    deadline_s: float | None = DEFAULT_DEADLINE_S,
+    backend: str = "sqlite",
+) -> dict[str, dict]:
+    """
+    Fetch many FRED series concurrently and bulk-load them into the database.
+
+    See fetchManySeries for the scheduling parameters and store_sqlite.bulkLoadSeries
+    for the load path. Failed series are reported and skipped; with a cache
+    directory, series that FRED reports unchanged and the table already holds
+    are not loaded again.
+
+    Returns
+    -------
+    dict
+        The per-series report from fetchManySeries.
+    """
+    stored = []
+    if cache_dir is not None:
+        stored = [
+            sid
+            for sid in dict.fromkeys(series_ids)
+            if lastStoredDate(db_path, table_name, series_id=sid, backend=backend) is not None
+        ]
+    start = time.perf_counter()
+    frames, report = fetchManySeries(
+        series_ids,
+        max_workers=max_workers,
+        cache_dir=cache_dir,
+        rate=rate,
+        max_retries=max_retries,
+        deadline_s=deadline_s,
+        existing=stored,
+    )
+    fetched = [sid for sid, entry in report.items() if entry["ok"]]
+    unchanged = [sid for sid in fetched if not report[sid]["modified"]]
+    print(
+        f"Fetched {len(fetched):,}/{len(report):,} series ({len(unchanged):,} not modified) "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    for series_id in unchanged:
+        print(f"{series_id} not modified; kept {backend}:///{db_path} table={table_name}")
+
+    if frames:
+        bulkLoadSeries(frames.items(), db_path, table_name, series_table=series_table, backend=backend)
+    for series_id, entry in report.items():
+        if not entry["ok"]:
+            print(f"{series_id}: FAILED after {entry['attempts']} attempt(s): {entry['error']}")
+    return report
+
+
+def readSeriesIds(path: str) -> list[str]:
+    """
+    Read FRED series IDs from a text file, one per line.
+
+    Blank lines and lines starting with "#" are ignored.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
 
 
 def main() -> None:
@@ -71,15 +805,93 @@ def main() -> None:
     CLI entry point.
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument("--series-id", required=True)
-    parser.add_argument("--out-csv", required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--series-id")
+    source.add_argument("--series-ids", help="Comma-separated list, e.g. PCOFFOTMUSDM,PCOCOUSDM")
+    source.add_argument("--series-file", help="Text file with one series ID per line")
+    parser.add_argument(
+        "--out",
+        "--out-csv",
+        dest="out",
+        help="Output file for a single --series-id (.parquet, .arrow or .csv); an optional export with --db-path",
+    )
+    parser.add_argument("--out-dir", help="Output directory for --series-ids/--series-file")
+    parser.add_argument("--format", default="parquet", choices=["parquet", "arrow", "csv"], help="Format for --out-dir")
+    parser.add_argument("--compression", help="Codec for parquet/arrow output, e.g. zstd")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_S, help="Max requests per second")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE_S, help="Time budget per series (s)")
+    parser.add_argument("--db-path", help="Write the fetched series straight into this database")
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite", help="Storage backend of --db-path")
+    parser.add_argument("--table", help="Long-format observations table")
+    parser.add_argument("--series-table", default=SERIES_TABLE, help="Series metadata table")
+    parser.add_argument("--series-name", help="Descriptive name stored in the series table")
+    parser.add_argument("--frequency", help="Frequency stored in the series table, e.g. monthly")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only fetch observations newer than the last date in --db-path/--table",
+    )
+    parser.add_argument("--cache-dir", help="Persistent FRED response cache (ETag/Last-Modified revalidation)")
+    parser.add_argument("--hash-file", help="Content-hash stamp for --series-id, touched only when the data changes")
     args = parser.parse_args()
 
-    series_id = args.series_id
-    out_csv = args.out_csv
-    writeSeriesToCsv(series_id, out_csv)
+    if args.series_id:
+        if args.db_path or args.table:
+            if not (args.db_path and args.table):
+                parser.error("--db-path and --table must be given together")
+            ingestSeries(
+                args.series_id,
+                args.db_path,
+                args.table,
+                incremental=args.incremental,
+                cache_dir=args.cache_dir,
+                export_path=args.out,
+                compression=args.compression,
+                series_table=args.series_table,
+                name=args.series_name,
+                frequency=args.frequency,
+                backend=args.backend,
+                hash_path=args.hash_file,
+            )
+            return
+        if args.incremental:
+            parser.error("--incremental requires --db-path and --table")
+        if not args.out:
+            parser.error("--out or --db-path/--table is required with --series-id")
+        writeSeries(args.series_id, args.out, cache_dir=args.cache_dir, compression=args.compression)
+        return
+
+    if args.series_ids:
+        series_ids = [x.strip() for x in args.series_ids.split(",") if x.strip()]
+    else:
+        series_ids = readSeriesIds(args.series_file)
+    schedule = {
+        "max_workers": args.max_workers,
+        "cache_dir": args.cache_dir,
+        "rate": args.rate,
+        "max_retries": args.max_retries,
+        "deadline_s": args.deadline,
+    }
+    if args.db_path or args.table:
+        if not (args.db_path and args.table):
+            parser.error("--db-path and --table must be given together")
+        report = ingestManySeries(
+            series_ids,
+            args.db_path,
+            args.table,
+            series_table=args.series_table,
+            backend=args.backend,
+            **schedule,
+        )
+    elif args.out_dir:
+        report = writeManySeries(series_ids, args.out_dir, fmt=args.format, compression=args.compression, **schedule)
+    else:
+        parser.error("--out-dir or --db-path/--table is required with --series-ids/--series-file")
+    if not all(entry["ok"] for entry in report.values()):
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
     main()
-
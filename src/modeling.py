@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import numpy as np
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+
+def splitIndex(n: int, test_size: float) -> int:
+    """
+    Number of leading (training) rows in a time-ordered split of n rows.
+    """
+    return n - max(1, int(round(n * test_size)))
+
+
+def fitRidge(
+    X_train: np.ndarray, y_train: np.ndarray, X_test: np.ndarray, y_test: np.ndarray
+) -> tuple[Ridge, np.ndarray, float, float]:
+    """
+    Fit the baseline Ridge model and score it on the test rows.
+
+    Returns
+    -------
+    (model, y_pred, mae, rmse)
+    """
+    model = Ridge(alpha=1.0)
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    mae = float(mean_absolute_error(y_test, y_pred))
+    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
+    return model, y_pred, mae, rmse
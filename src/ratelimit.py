@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Callable, TypeVar
+
+import requests
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class RetriesExhausted(RuntimeError):
+    """
+    Raised when a call keeps failing until its retries or deadline run out.
+
+    Attributes
+    ----------
+    attempts:
+        Number of attempts made before giving up.
+    """
+
+    def __init__(self, message: str, attempts: int) -> None:
+        super().__init__(message)
+        self.attempts = attempts
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting how many requests start per second.
+
+    Parameters
+    ----------
+    rate:
+        Tokens added per second (sustained requests per second).
+    capacity:
+        Maximum burst size. Defaults to max(1, rate).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive. Got: {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: float | None = None) -> bool:
+        """
+        Block until a token is available and take it.
+
+        Parameters
+        ----------
+        deadline:
+            Optional absolute time.monotonic() value after which to give up.
+
+        Returns
+        -------
+        bool
+            True if a token was taken, False if the deadline would pass first.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate
+
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def isRetryable(exc: Exception) -> bool:
+    """
+    Whether a failed request is worth retrying: throttling (429), server errors
+    (5xx), timeouts and dropped connections.
+    """
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+def retryAfterSeconds(exc: Exception) -> float | None:
+    """
+    Return the server's Retry-After delay in seconds, if it sent one.
+    """
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+def backoffDelay(attempt: int, backoff_s: float, max_backoff_s: float) -> float:
+    """
+    Exponential backoff with full jitter: uniform in [0, min(cap, base * 2**attempt)].
+    """
+    return random.uniform(0.0, min(max_backoff_s, backoff_s * (2**attempt)))
+
+
+def callWithRetry(
+    fn: Callable[[float], T],
+    bucket: TokenBucket | None = None,
+    max_retries: int = 5,
+    backoff_s: float = 0.5,
+    max_backoff_s: float = 30.0,
+    deadline_s: float | None = None,
+    timeout_s: float = 30.0,
+) -> tuple[T, int]:
+    """
+    Call `fn` with rate limiting, jittered exponential retries and a deadline.
+
+    Parameters
+    ----------
+    fn:
+        The call to make. Receives the timeout in seconds for this attempt
+        (capped by the remaining deadline).
+    bucket:
+        Optional token bucket; one token is taken per attempt.
+    max_retries:
+        Number of retries after the first attempt for retryable errors.
+    backoff_s, max_backoff_s:
+        Base and cap of the jittered exponential backoff between attempts.
+    deadline_s:
+        Optional overall time budget for all attempts, in seconds.
+    timeout_s:
+        Per-attempt timeout when no tighter deadline applies.
+
+    Returns
+    -------
+    (result, attempts):
+        The return value of `fn` and the number of attempts it took.
+
+    Raises
+    ------
+    RetriesExhausted
+        If the deadline passes or retryable errors persist past max_retries.
+    Exception
+        Non-retryable errors from `fn` are re-raised unchanged.
+    """
+    deadline = time.monotonic() + deadline_s if deadline_s is not None else None
+    attempt = 0
+    while True:
+        if bucket is not None and not bucket.acquire(deadline=deadline):
+            raise RetriesExhausted(f"Deadline of {deadline_s}s passed waiting for rate limit", attempt)
+
+        timeout = timeout_s if deadline is None else min(timeout_s, deadline - time.monotonic())
+        if timeout <= 0:
+            raise RetriesExhausted(f"Deadline of {deadline_s}s passed", attempt)
+
+        attempt += 1
+        try:
+            return fn(timeout), attempt
+        except Exception as exc:
+            if not isRetryable(exc):
+                raise
+            if attempt > max_retries:
+                raise RetriesExhausted(f"Gave up after {attempt} attempts: {exc}", attempt) from exc
+
+            delay = retryAfterSeconds(exc)
+            if delay is None:
+                delay = backoffDelay(attempt - 1, backoff_s, max_backoff_s)
+            delay = min(delay, max_backoff_s)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                message = f"Deadline of {deadline_s}s passed after {attempt} attempts: {exc}"
+                raise RetriesExhausted(message, attempt) from exc
+            time.sleep(delay)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+
+RAW_FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+
+def seriesFormat(path: str) -> str:
+    """
+    Infer the on-disk format of a raw series file from its extension.
+
+    Returns
+    -------
+    str
+        One of "csv", "parquet" or "arrow" (Arrow IPC / Feather v2).
+
+    Raises
+    ------
+    ValueError
+        If the extension is not recognised.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in RAW_FORMATS:
+        raise ValueError(f"Unsupported series file extension {ext!r} for {path}. Use one of {sorted(RAW_FORMATS)}")
+    return RAW_FORMATS[ext]
+
+
+def writeSeriesFile(df: pd.DataFrame, path: str, compression: str | None = None) -> None:
+    """
+    Write a (date, value) series to disk in the format given by the extension.
+
+    Parquet and Arrow IPC keep the datetime64 and float64 column types, so
+    readers load them without any text parsing (requires pyarrow).
+
+    Parameters
+    ----------
+    df:
+        DataFrame with columns ["date", "value"].
+    path:
+        Output path ending in .parquet, .arrow/.feather or .csv.
+    compression:
+        Optional codec for the columnar formats (e.g., "zstd", "lz4", "snappy").
+        Ignored for CSV.
+    """
+    fmt = seriesFormat(path)
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+
+    if fmt == "parquet":
+        df.to_parquet(path, index=False, compression=compression)
+    elif fmt == "arrow":
+        df.reset_index(drop=True).to_feather(path, compression=compression or "uncompressed")
+    else:
+        df.to_csv(path, index=False)
+
+
+def readSeriesFile(path: str) -> pd.DataFrame:
+    """
+    Read a (date, value) series written by writeSeriesFile.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with a datetime64 "date" column and a float "value" column.
+    """
+    fmt = seriesFormat(path)
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    if fmt == "arrow":
+        return pd.read_feather(path)
+    return pd.read_csv(path, parse_dates=["date"])
@@ -1,44 +1,854 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import os
+import sqlite3
+import time
+from contextlib import closing
+from itertools import islice
+from typing import Any, Iterable, Iterator
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
 
+from series_io import RAW_FORMATS, readSeriesFile
 
-def main(in_csv: str, db_path: str, table_name: str) -> None:
+BACKENDS = ("sqlite", "duckdb")
+SERIES_TABLE = "series"
+BULK_BATCH_ROWS = 50_000
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-262144",
+    "PRAGMA temp_store=MEMORY",
+)
+DATE_TYPES = {"sqlite": "INTEGER", "duckdb": "BIGINT"}
+VALUE_TYPES = {"sqlite": "REAL", "duckdb": "DOUBLE"}
+
+
+def toEpochSeconds(dates) -> np.ndarray:
+    """
+    Encode dates as int64 seconds since 1970-01-01 (naive dates are taken as UTC).
+    """
+    return np.asarray(pd.to_datetime(dates), dtype="datetime64[s]").astype(np.int64)
+
+
+def fromEpochSeconds(seconds) -> np.ndarray:
+    """
+    Decode int64 epoch seconds into a datetime64[ns] array without any string parsing.
+    """
+    return np.asarray(seconds, dtype=np.int64).astype("datetime64[s]").astype("datetime64[ns]")
+
+
+def hashEpochSeries(seconds, values) -> str:
+    """
+    SHA-256 of a series given as epoch seconds and values, in row order.
+
+    Both arrays are hashed as little-endian int64/float64 bytes with every
+    missing value mapped to one NaN bit pattern, so the digest is stable
+    across platforms, backends and NULL/NaN representations.
+    """
+    values = np.array(values, dtype="<f8")
+    values[np.isnan(values)] = np.nan
+    digest = hashlib.sha256(np.ascontiguousarray(seconds, dtype="<i8").tobytes())
+    digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def seriesContentHash(df: pd.DataFrame) -> str:
+    """
+    Content hash of a date-sorted (date, value) DataFrame; equal to the hash
+    stored in the series table when the table holds exactly these rows.
+    """
+    return hashEpochSeries(toEpochSeconds(df["date"]), df["value"].to_numpy(dtype=np.float64))
+
+
+def connectDb(db_path: str, backend: str = "sqlite") -> Any:
+    """
+    Open a database connection for the given storage backend.
+
+    "sqlite" returns a stdlib connection in autocommit mode, so transactions
+    are explicit (`BEGIN`/`COMMIT`); "duckdb" returns a DuckDB connection
+    (vectorized, columnar storage; requires the optional duckdb package).
+    The parent directory is created if needed.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown.
+    ImportError
+        If the duckdb backend is requested but duckdb is not installed.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown storage backend {backend!r}. Use one of {BACKENDS}")
+
+    dirname = os.path.dirname(db_path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+
+    if backend == "duckdb":
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("The duckdb storage backend requires the duckdb package (pip install duckdb).") from e
+        return duckdb.connect(db_path)
+    return sqlite3.connect(db_path, isolation_level=None)
+
+
+def tableExists(conn: Any, table_name: str, backend: str = "sqlite") -> bool:
+    """
+    Whether a table exists in the connected database.
+    """
+    if backend == "duckdb":
+        query = "SELECT 1 FROM information_schema.tables WHERE table_name = ?"
+    else:
+        query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return conn.execute(query, (table_name,)).fetchone() is not None
+
+
+def fetchColumns(conn: Any, sql: str, params: Iterable = ()) -> list[np.ndarray]:
+    """
+    Run a query and return each result column as a NumPy array.
+
+    DuckDB results are fetched column-wise without building Python rows.
+    """
+    cursor = conn.execute(sql, list(params))
+    if hasattr(cursor, "fetchnumpy"):
+        columns = cursor.fetchnumpy().values()
+        return [col.astype(np.float64).filled(np.nan) if np.ma.isMaskedArray(col) else col for col in columns]
+    rows = cursor.fetchall()
+    if not rows:
+        return [np.array([]) for _ in cursor.description]
+    return [np.array(col) for col in zip(*rows)]
+
+
+def ensureSchema(
+    conn: Any,
+    table_name: str,
+    series_table: str = SERIES_TABLE,
+    indexes: bool = True,
+    backend: str = "sqlite",
+) -> None:
+    """
+    Create the long-format observations table and the series metadata table.
+
+    The series table also tracks a content hash of each stored series and
+    when it last changed (see refreshContentHash); the two columns are added
+    to series tables created by earlier versions.
+
+    The observations table holds every series as (series_id, date, value) rows,
+    with dates as INTEGER epoch seconds and values as REAL, so range predicates
+    compare integers on the index and reads decode straight into datetime64.
+    On SQLite it is a WITHOUT ROWID table clustered on its (series_id, date)
+    primary key, so that key is a covering index: reading one or many series,
+    or a date range of a series, is a single index range scan. A secondary
+    (date, value) index (which also carries series_id) covers date slices
+    across all series. DuckDB stores the same columns column-wise (BIGINT
+    dates, DOUBLE values, since its INTEGER and REAL are 32-bit) and relies
+    on its primary key and zone maps instead of the secondary index.
+
+    Parameters
+    ----------
+    conn:
+        Open connection (see connectDb).
+    table_name:
+        Name of the observations table.
+    series_table:
+        Name of the series metadata table.
+    indexes:
+        If False, skip the secondary index (bulk loads create it afterwards
+        with createIndexes).
+    backend:
+        Storage backend of the connection ("sqlite" or "duckdb").
+
+    Raises
+    ------
+    ValueError
+        If a table with that name exists without the (series_id, date) primary
+        key or with TEXT dates, e.g. one written by `to_sql` or an earlier
+        version of this module.
+    """
+    date_type = DATE_TYPES[backend]
+    clustered = " WITHOUT ROWID" if backend == "sqlite" else ""
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{table_name}" ('
+        "series_id TEXT NOT NULL, "
+        f'"date" {date_type} NOT NULL, '
+        f"value {VALUE_TYPES[backend]}, "
+        f'PRIMARY KEY (series_id, "date")){clustered}'
+    )
+    columns = {row[1]: row for row in conn.execute(f"PRAGMA table_info('{table_name}')").fetchall()}
+    pk = sorted(name for name, row in columns.items() if row[5])
+    if pk != ["date", "series_id"] or columns["date"][2].upper() != date_type:
+        raise ValueError(
+            f"Table {table_name} is not keyed by (series_id, date) with {date_type} epoch dates. "
+            "Drop it (or use a new table name) and re-ingest."
+        )
+
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{series_table}" ('
+        "series_id TEXT PRIMARY KEY, "
+        "name TEXT, "
+        "frequency TEXT, "
+        f"first_date {date_type}, "
+        f"last_date {date_type}, "
+        "n_obs INTEGER, "
+        f"updated_at {date_type}, "
+        "content_hash TEXT, "
+        f"changed_at {date_type})"
+    )
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info('{series_table}')").fetchall()}
+    for column, column_type in (("content_hash", "TEXT"), ("changed_at", date_type)):
+        if column not in existing:
+            conn.execute(f'ALTER TABLE "{series_table}" ADD COLUMN {column} {column_type}')
+    if indexes:
+        createIndexes(conn, table_name, backend=backend)
+
+
+def createIndexes(conn: Any, table_name: str, backend: str = "sqlite") -> None:
+    """
+    Create the secondary (date, value) index used for cross-series date slices
+    (SQLite only; DuckDB scans use zone maps and would have to rewrite an
+    index on the upserted value column).
+    """
+    if backend == "sqlite":
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{table_name}_date_idx" ON "{table_name}" ("date", value)')
+
+
+def upsertSql(table_name: str, source: str = "VALUES (?, ?, ?)", backend: str = "sqlite") -> str:
+    """
+    Build the upsert statement for the observations table.
+
+    Rows whose value is unchanged match the conflict target but fail the
+    WHERE clause, so they are not rewritten.
+    """
+    distinct = "IS DISTINCT FROM" if backend == "duckdb" else "IS NOT"
+    return (
+        f'INSERT INTO "{table_name}" (series_id, "date", value) {source} '
+        'ON CONFLICT (series_id, "date") DO UPDATE SET value = excluded.value '
+        f'WHERE "{table_name}".value {distinct} excluded.value'
+    )
+
+
+def observationFrame(frames: Iterable[tuple[str, pd.DataFrame]]) -> pd.DataFrame:
+    """
+    Stack (series_id, DataFrame) pairs into one typed (series_id, epoch seconds,
+    value) frame, the unit of vectorized writes on DuckDB.
+    """
+    parts = [
+        pd.DataFrame(
+            {
+                "series_id": np.full(len(df), series_id, dtype=object),
+                "date": toEpochSeconds(df["date"]),
+                "value": df["value"].to_numpy(dtype=np.float64),
+            }
+        )
+        for series_id, df in frames
+    ]
+    if not parts:
+        return pd.DataFrame({"series_id": [], "date": np.array([], dtype=np.int64), "value": []})
+    return pd.concat(parts, ignore_index=True)
+
+
+def writeObservations(
+    conn: Any, table_name: str, frames: Iterable[tuple[str, pd.DataFrame]], backend: str = "sqlite"
+) -> int:
+    """
+    Upsert rows into the observations table on an open connection (inside the
+    caller's transaction). SQLite binds rows with `executemany`; DuckDB scans
+    one registered DataFrame.
+
+    Returns
+    -------
+    int
+        Number of rows inserted or changed.
+    """
+    if backend == "duckdb":
+        conn.register("_rows", observationFrame(frames))
+        try:
+            sql = upsertSql(table_name, 'SELECT * FROM _rows WHERE true ORDER BY series_id, "date"', backend)
+            return int(conn.execute(sql).fetchone()[0])
+        finally:
+            conn.unregister("_rows")
+
+    before = conn.total_changes
+    conn.executemany(upsertSql(table_name), iterObservationRows(frames))
+    return conn.total_changes - before
+
+
+def refreshSeriesMetadata(
+    conn: Any,
+    table_name: str,
+    series_table: str,
+    where: str,
+    params: tuple = (),
+    name: str | None = None,
+    frequency: str | None = None,
+) -> None:
+    """
+    Recompute first/last date and row counts in the series metadata table for
+    the series selected by `where` (a predicate on the observations table).
+    A given name/frequency overwrites the stored one; None keeps it.
+    """
+    conn.execute(
+        f'INSERT INTO "{series_table}" (series_id, name, frequency, first_date, last_date, n_obs, updated_at) '
+        f'SELECT series_id, ?, ?, MIN("date"), MAX("date"), COUNT(*), ? FROM "{table_name}" '
+        f"WHERE {where} GROUP BY series_id "
+        "ON CONFLICT (series_id) DO UPDATE SET "
+        f'name = COALESCE(excluded.name, "{series_table}".name), '
+        f'frequency = COALESCE(excluded.frequency, "{series_table}".frequency), '
+        "first_date = excluded.first_date, "
+        "last_date = excluded.last_date, "
+        "n_obs = excluded.n_obs, "
+        "updated_at = excluded.updated_at",
+        (name, frequency, int(time.time()), *params),
+    )
+
+
+def contentState(conn: Any, series_table: str, series_id: str) -> tuple[str | None, int | None]:
+    """
+    Return the stored (content_hash, changed_at) of a series, or (None, None).
+    """
+    row = conn.execute(
+        f'SELECT content_hash, changed_at FROM "{series_table}" WHERE series_id = ?', (series_id,)
+    ).fetchone()
+    return (None, None) if row is None else (row[0], row[1])
+
+
+def refreshContentHash(conn: Any, table_name: str, series_table: str, series_id: str) -> str | None:
+    """
+    Recompute the content hash of one stored series from the observations
+    table (a primary-key range scan). `changed_at` only moves when the hash
+    differs from the stored one.
+
+    Returns
+    -------
+    str | None
+        The hash, or None if the series has no metadata row (no observations).
+    """
+    row = conn.execute(f'SELECT content_hash FROM "{series_table}" WHERE series_id = ?', (series_id,)).fetchone()
+    if row is None:
+        return None
+    dates, values = fetchColumns(
+        conn, f'SELECT "date", value FROM "{table_name}" WHERE series_id = ? ORDER BY "date"', (series_id,)
+    )
+    digest = hashEpochSeries(dates.astype(np.int64), values.astype(np.float64))
+    if row[0] != digest:
+        conn.execute(
+            f'UPDATE "{series_table}" SET content_hash = ?, changed_at = ? WHERE series_id = ?',
+            (digest, int(time.time()), series_id),
+        )
+    return digest
+
+
+def readContentState(
+    db_path: str, series_id: str, series_table: str = SERIES_TABLE, backend: str = "sqlite"
+) -> tuple[str | None, int | None]:
+    """
+    Return the stored (content_hash, changed_at epoch seconds) of a series,
+    or (None, None) if the database, table or series is missing.
+    """
+    if not os.path.exists(db_path):
+        return None, None
+    with closing(connectDb(db_path, backend)) as conn:
+        if not tableExists(conn, series_table, backend):
+            return None, None
+        return contentState(conn, series_table, series_id)
+
+
+def lastStoredDate(
+    db_path: str, table_name: str, series_id: str | None = None, backend: str = "sqlite"
+) -> pd.Timestamp | None:
+    """
+    Return the most recent date stored in an observations table.
+
+    Parameters
+    ----------
+    db_path:
+        Path to the database file.
+    table_name:
+        Name of the table holding (series_id, date, value) rows.
+    series_id:
+        Optional series to restrict to. When omitted, the latest date over all
+        rows is returned.
+    backend:
+        Storage backend ("sqlite" or "duckdb").
+
+    Returns
+    -------
+    pd.Timestamp | None
+        The last stored date, or None if the database, table or rows are missing.
     """
-    Read a (date, value) CSV file and write it to a SQLite table.
+    if not os.path.exists(db_path):
+        return None
+
+    with closing(connectDb(db_path, backend)) as conn:
+        if not tableExists(conn, table_name, backend):
+            return None
+        if series_id is None:
+            last = conn.execute(f'SELECT MAX("date") FROM "{table_name}"').fetchone()[0]
+        else:
+            last = conn.execute(
+                f'SELECT MAX("date") FROM "{table_name}" WHERE series_id = ?', (series_id,)
+            ).fetchone()[0]
+    return None if last is None else pd.Timestamp(last, unit="s")
+
+
+def upsertSeries(
+    df: pd.DataFrame,
+    db_path: str,
+    table_name: str,
+    series_id: str,
+    series_table: str = SERIES_TABLE,
+    name: str | None = None,
+    frequency: str | None = None,
+    backend: str = "sqlite",
+) -> int:
+    """
+    Upsert (date, value) rows of one series into the observations table.
+
+    Rows are written with a bulk `INSERT ... ON CONFLICT DO UPDATE` inside a
+    single transaction. Rows whose value is unchanged are not rewritten, and
+    the table is never dropped, so concurrent readers always see a complete,
+    consistent table. The series' content hash is recomputed in the same
+    transaction when any row changed.
 
     Parameters
     ----------
-    in_csv:
-        Path to the input CSV file.
+    df:
+        DataFrame with columns ["date", "value"].
     db_path:
-        Path to the SQLite database file.
+        Path to the database file.
     table_name:
-        Name of the table to create or replace.
+        Name of the observations table (created if missing).
+    series_id:
+        Identifier stored alongside each row, e.g. the FRED series ID.
+    series_table:
+        Name of the series metadata table, refreshed in the same transaction.
+    name, frequency:
+        Optional descriptive metadata for the series table.
+    backend:
+        Storage backend ("sqlite" or "duckdb").
+
+    Returns
+    -------
+    int
+        Number of rows inserted or changed.
+    """
+    with closing(connectDb(db_path, backend)) as conn:
+        conn.execute("BEGIN")
+        ensureSchema(conn, table_name, series_table, backend=backend)
+        n_changed = writeObservations(conn, table_name, [(series_id, df)], backend)
+        refreshSeriesMetadata(
+            conn, table_name, series_table, "series_id = ?", (series_id,), name=name, frequency=frequency
+        )
+        if n_changed or contentState(conn, series_table, series_id)[0] is None:
+            refreshContentHash(conn, table_name, series_table, series_id)
+        conn.execute("COMMIT")
+        return n_changed
+
+
+def readObservations(
+    db_path: str,
+    table_name: str,
+    series_ids: list[str] | None = None,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    backend: str = "sqlite",
+) -> pd.DataFrame:
+    """
+    Read long-format observations for many series in one indexed query.
+
+    Parameters
+    ----------
+    db_path:
+        Path to the database file.
+    table_name:
+        Name of the observations table.
+    series_ids:
+        Series to read. None reads all series (e.g., for a date slice across
+        the whole universe).
+    start, end:
+        Optional inclusive date bounds.
+    backend:
+        Storage backend ("sqlite" or "duckdb").
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns ["series_id", "date", "value"], sorted by series_id then date.
     """
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    clauses, params = [], []
+    if series_ids is not None:
+        clauses.append(f"series_id IN ({', '.join('?' for _ in series_ids)})")
+        params.extend(series_ids)
+    if start is not None:
+        clauses.append('"date" >= ?')
+        params.append(int(toEpochSeconds([start])[0]))
+    if end is not None:
+        clauses.append('"date" <= ?')
+        params.append(int(toEpochSeconds([end])[0]))
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+
+    with closing(connectDb(db_path, backend)) as conn:
+        ids, dates, values = fetchColumns(
+            conn, f'SELECT series_id, "date", value FROM "{table_name}" {where}ORDER BY series_id, "date"', params
+        )
+    return pd.DataFrame(
+        {
+            "series_id": ids.astype(object),
+            "date": fromEpochSeconds(dates),
+            "value": values.astype(np.float64),
+        }
+    )
+
+
+def onlySeriesId(db_path: str, table_name: str, backend: str = "sqlite") -> str:
+    """
+    Return the series ID of a table that holds exactly one series.
+
+    Uses MIN/MAX over the (series_id, date) key, so the check is two index
+    lookups regardless of table size.
+
+    Raises
+    ------
+    ValueError
+        If the table is empty or holds several series.
+    """
+    with closing(connectDb(db_path, backend)) as conn:
+        first, last = conn.execute(f'SELECT MIN(series_id), MAX(series_id) FROM "{table_name}"').fetchone()
+    if first is None:
+        raise ValueError(f"Table {table_name} is empty.")
+    if first != last:
+        raise ValueError(f"Table {table_name} holds several series; pass series_id to select one.")
+    return first
+
+
+def readSeriesWindow(
+    db_path: str,
+    table_name: str,
+    series_id: str,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    warmup_rows: int = 0,
+    lookahead_rows: int = 0,
+    backend: str = "sqlite",
+) -> pd.DataFrame:
+    """
+    Read only the (date, value) columns of one series within a date range,
+    plus a fixed number of context rows on either side.
+
+    Each part is an index range scan on (series_id, date): the warm-up rows
+    are the last `warmup_rows` before `start` (read backwards with a LIMIT),
+    and the look-ahead rows the first `lookahead_rows` after `end`. The read
+    size therefore depends on the range, not on the length of the history.
+
+    Parameters
+    ----------
+    db_path:
+        Path to the database file.
+    table_name:
+        Name of the observations table.
+    series_id:
+        Series to read.
+    start, end:
+        Optional inclusive date bounds; None leaves that side open.
+    warmup_rows:
+        Rows to include before `start` (e.g., the largest lag/window).
+    lookahead_rows:
+        Rows to include after `end` (e.g., for a next-step target).
+    backend:
+        Storage backend ("sqlite" or "duckdb").
+
+    Returns
+    -------
+    pd.DataFrame
+        Columns ["date", "value"] sorted by date.
+    """
+    lo = None if start is None else int(toEpochSeconds([start])[0])
+    hi = None if end is None else int(toEpochSeconds([end])[0])
+    base = f'SELECT "date", value FROM "{table_name}" WHERE series_id = ?'
+
+    parts: list[list[np.ndarray]] = []
+    with closing(connectDb(db_path, backend)) as conn:
+        if lo is not None and warmup_rows > 0:
+            dates, values = fetchColumns(
+                conn, f'{base} AND "date" < ? ORDER BY "date" DESC LIMIT ?', (series_id, lo, warmup_rows)
+            )
+            parts.append([dates[::-1], values[::-1]])
+
+        clauses, params = [], [series_id]
+        if lo is not None:
+            clauses.append('"date" >= ?')
+            params.append(lo)
+        if hi is not None:
+            clauses.append('"date" <= ?')
+            params.append(hi)
+        where = "".join(f" AND {c}" for c in clauses)
+        parts.append(fetchColumns(conn, f'{base}{where} ORDER BY "date"', params))
+
+        if hi is not None and lookahead_rows > 0:
+            parts.append(
+                fetchColumns(conn, f'{base} AND "date" > ? ORDER BY "date" LIMIT ?', (series_id, hi, lookahead_rows))
+            )
 
-    df = pd.read_csv(in_csv, parse_dates=["date"])
+    dates = np.concatenate([part[0].astype(np.int64) for part in parts])
+    values = np.concatenate([part[1].astype(np.float64) for part in parts])
+    return pd.DataFrame({"date": fromEpochSeconds(dates), "value": values})
+
+
+def iterSeriesChunks(
+    db_path: str,
+    table_name: str,
+    series_id: str,
+    chunk_rows: int = BULK_BATCH_ROWS,
+    backend: str = "sqlite",
+) -> Iterator[pd.DataFrame]:
+    """
+    Read one series in date order, `chunk_rows` observations at a time.
+
+    Each chunk is its own index range scan on (series_id, date) that starts
+    after the last date of the previous one (keyset pagination), so no chunk
+    re-reads or skips rows and memory is bounded by the chunk size.
+
+    Yields
+    ------
+    pd.DataFrame
+        Columns ["date", "value"] sorted by date; only the last chunk may be
+        shorter than `chunk_rows`.
+    """
+    if chunk_rows < 1:
+        raise ValueError(f"chunk_rows must be positive. Got: {chunk_rows}")
+    base = f'SELECT "date", value FROM "{table_name}" WHERE series_id = ?'
+    after = None
+    with closing(connectDb(db_path, backend)) as conn:
+        while True:
+            if after is None:
+                dates, values = fetchColumns(conn, f'{base} ORDER BY "date" LIMIT ?', (series_id, chunk_rows))
+            else:
+                dates, values = fetchColumns(
+                    conn, f'{base} AND "date" > ? ORDER BY "date" LIMIT ?', (series_id, after, chunk_rows)
+                )
+            if len(dates) == 0:
+                return
+            dates = dates.astype(np.int64)
+            yield pd.DataFrame({"date": fromEpochSeconds(dates), "value": values.astype(np.float64)})
+            if len(dates) < chunk_rows:
+                return
+            after = int(dates[-1])
+
+
+def iterObservationRows(frames: Iterable[tuple[str, pd.DataFrame]]) -> Iterator[tuple[str, int, float]]:
+    """
+    Flatten (series_id, DataFrame) pairs into (series_id, epoch seconds, value) rows.
+    """
+    for series_id, df in frames:
+        dates = toEpochSeconds(df["date"]).tolist()
+        yield from zip([series_id] * len(df), dates, df["value"].astype(float).tolist())
+
+
+def iterFrameBatches(
+    frames: Iterable[tuple[str, pd.DataFrame]], batch_size: int
+) -> Iterator[list[tuple[str, pd.DataFrame]]]:
+    """
+    Group (series_id, DataFrame) pairs into batches of at least `batch_size` rows.
+    """
+    batch, n_rows = [], 0
+    for series_id, df in frames:
+        batch.append((series_id, df))
+        n_rows += len(df)
+        if n_rows >= batch_size:
+            yield batch
+            batch, n_rows = [], 0
+    if batch:
+        yield batch
+
+
+def bulkLoadSeries(
+    frames: Iterable[tuple[str, pd.DataFrame]],
+    db_path: str,
+    table_name: str,
+    series_table: str = SERIES_TABLE,
+    batch_size: int = BULK_BATCH_ROWS,
+    backend: str = "sqlite",
+) -> int:
+    """
+    Bulk-load many series into the observations table.
+
+    Intended for backfills of thousands of series. Rows go into an unindexed
+    temporary staging table, one explicit transaction per batch. The keyed
+    table is then filled from the staging table in one sorted upsert after
+    the load, and the secondary date index is only created once the data is
+    in place, so no index is updated row by row. Content hashes of the loaded
+    series are refreshed in the same final transaction.
+
+    On SQLite the connection switches to WAL journaling with
+    synchronous=NORMAL and a 256 MB page cache, and batches are inserted
+    with `executemany`. On DuckDB each batch is appended from a registered
+    DataFrame in one vectorized INSERT ... SELECT.
+
+    Parameters
+    ----------
+    frames:
+        Iterable of (series_id, DataFrame with ["date", "value"]) pairs.
+    db_path:
+        Path to the database file.
+    table_name:
+        Name of the observations table (created if missing).
+    series_table:
+        Name of the series metadata table.
+    batch_size:
+        Rows per staging batch/transaction.
+    backend:
+        Storage backend ("sqlite" or "duckdb").
+
+    Returns
+    -------
+    int
+        Number of rows loaded.
+    """
+    start = time.perf_counter()
+    n_rows = 0
+    with closing(connectDb(db_path, backend)) as conn:
+        if backend == "sqlite":
+            for pragma in BULK_PRAGMAS:
+                conn.execute(pragma)
+        conn.execute(f'CREATE TEMP TABLE _stage (series_id TEXT, "date" {DATE_TYPES[backend]}, value {VALUE_TYPES[backend]})')
+
+        if backend == "duckdb":
+            for batch in iterFrameBatches(frames, batch_size):
+                conn.register("_batch", observationFrame(batch))
+                conn.execute("BEGIN")
+                n_rows += int(conn.execute("INSERT INTO _stage SELECT * FROM _batch").fetchone()[0])
+                conn.execute("COMMIT")
+                conn.unregister("_batch")
+        else:
+            rows = iterObservationRows(frames)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                conn.execute("BEGIN")
+                conn.executemany("INSERT INTO _stage VALUES (?, ?, ?)", batch)
+                conn.execute("COMMIT")
+                n_rows += len(batch)
+
+        conn.execute("BEGIN")
+        ensureSchema(conn, table_name, series_table, indexes=False, backend=backend)
+        conn.execute(upsertSql(table_name, 'SELECT * FROM _stage WHERE true ORDER BY series_id, "date"', backend))
+        createIndexes(conn, table_name, backend=backend)
+        staged = "series_id IN (SELECT DISTINCT series_id FROM _stage)"
+        refreshSeriesMetadata(conn, table_name, series_table, staged)
+        for (series_id,) in conn.execute("SELECT DISTINCT series_id FROM _stage").fetchall():
+            refreshContentHash(conn, table_name, series_table, series_id)
+        conn.execute("COMMIT")
+        conn.execute("DROP TABLE _stage")
+
+    elapsed = time.perf_counter() - start
+    rate = n_rows / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"Bulk-loaded {n_rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s) "
+        f"into {backend}:///{db_path} table={table_name}"
+    )
+    return n_rows
+
+
+def main(
+    in_path: str,
+    db_path: str,
+    table_name: str,
+    series_id: str,
+    series_table: str = SERIES_TABLE,
+    backend: str = "sqlite",
+) -> None:
+    """
+    Read a (date, value) raw series file and upsert it into the observations table.
+
+    Parameters
+    ----------
+    in_path:
+        Path to the input file (.parquet, .arrow/.feather or .csv).
+    db_path:
+        Path to the database file.
+    table_name:
+        Name of the observations table.
+    series_id:
+        Identifier stored with the rows, e.g. the FRED series ID.
+    series_table:
+        Name of the series metadata table.
+    backend:
+        Storage backend ("sqlite" or "duckdb").
+    """
+    df = readSeriesFile(in_path)
     if not {"date", "value"}.issubset(df.columns):
         raise ValueError(
-            f"Expected columns date,value in {in_csv}. Got: {df.columns.tolist()}"
+            f"Expected columns date,value in {in_path}. Got: {df.columns.tolist()}"
         )
 
-    engine = create_engine(f"sqlite:///{db_path}")
-    df.to_sql(table_name, engine, if_exists="replace", index=False)
+    n_changed = upsertSeries(df, db_path, table_name, series_id, series_table=series_table, backend=backend)
+    print(
+        f"Upserted {len(df):,} rows ({n_changed:,} new or changed) "
+        f"into {backend}:///{db_path} table={table_name}"
+    )
 
-    print(f"Loaded {len(df):,} rows into sqlite:///{db_path} table={table_name}")
+
+def bulkLoadDirectory(
+    in_dir: str,
+    db_path: str,
+    table_name: str,
+    series_table: str = SERIES_TABLE,
+    batch_size: int = BULK_BATCH_ROWS,
+    backend: str = "sqlite",
+) -> int:
+    """
+    Bulk-load every raw series file in a directory (one file per series, named
+    "<series_id>.<ext>" as written by `fetch_tseries.py --out-dir`).
+
+    Files are read lazily, one at a time, while the rows are streamed into
+    bulkLoadSeries.
+    """
+    paths = sorted(
+        os.path.join(in_dir, name)
+        for name in os.listdir(in_dir)
+        if os.path.splitext(name)[1].lower() in RAW_FORMATS
+    )
+    frames = ((os.path.splitext(os.path.basename(path))[0], readSeriesFile(path)) for path in paths)
+    return bulkLoadSeries(
+        frames, db_path, table_name, series_table=series_table, batch_size=batch_size, backend=backend
+    )
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--in-csv", required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--in-path", "--in-csv", dest="in_path")
+    source.add_argument("--in-dir", help="Bulk-load every <series_id>.<ext> file in this directory")
     parser.add_argument("--db-path", required=True)
-    parser.add_argument("--table", required=True)
+    parser.add_argument("--backend", choices=BACKENDS, default="sqlite", help="Storage backend")
+    parser.add_argument("--table", required=True, help="Long-format observations table")
+    parser.add_argument("--series-table", default=SERIES_TABLE, help="Series metadata table")
+    parser.add_argument("--series-id", help="Series identifier for --in-path")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_ROWS)
     args = parser.parse_args()
 
-    main(args.in_csv, args.db_path, args.table)
+    if args.in_dir:
+        bulkLoadDirectory(
+            args.in_dir,
+            args.db_path,
+            args.table,
+            series_table=args.series_table,
+            batch_size=args.batch_size,
+            backend=args.backend,
+        )
+    else:
+        if not args.series_id:
+            parser.error("--series-id is required with --in-path")
+        main(
+            args.in_path,
+            args.db_path,
+            args.table,
+            args.series_id,
+            series_table=args.series_table,
+            backend=args.backend,
+        )
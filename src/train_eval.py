@@ -6,41 +6,27 @@ import os
 
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import Ridge
-from sklearn.metrics import mean_absolute_error, mean_squared_error
 
+from feature_store import isFeatureStore, readFeatureMatrix, readMeta
+from modeling import fitRidge, splitIndex
 
-def timeSplit(df: pd.DataFrame, test_size: float) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """
-    Time-ordered train/test split (no shuffling).
 
-    Parameters
-    ----------
-    df:
-        Input dataframe sorted by time (or to be treated as time-ordered).
-    test_size:
-        Fraction of rows to reserve for the test set.
-
-    Returns
-    -------
-    (train_df, test_df):
-        Two dataframes split by time order.
-    """
-    n = len(df)
-    n_test = max(1, int(round(n * test_size)))
-    train = df.iloc[: n - n_test].copy()
-    test = df.iloc[n - n_test :].copy()
-    return train, test
-
-
-def main(features_csv: str, out_metrics: str, out_preds: str, test_size: float) -> None:
+def main(
+    features_path: str,
+    out_metrics: str,
+    out_preds: str,
+    test_size: float,
+    max_metric_drift: float | None = None,
+    out_model: str | None = None,
+) -> None:
     """
     Train a baseline Ridge regression model and write evaluation artifacts.
 
     Inputs
     ------
-    features_csv:
-        Feature dataset produced by the feature engineering step.
+    features_path:
+        Feature dataset produced by the feature engineering step: a feature
+        store directory (memory-mapped straight into X/y) or a CSV file.
 
     Outputs
     -------
@@ -49,65 +35,120 @@ def main(features_csv: str, out_metrics: str, out_preds: str, test_size: float)
     out_preds:
         CSV with columns [date, y_true, y_pred] over the test period.
 
+    Parameters
+    ----------
+    max_metric_drift:
+        For a compact (float32) feature store: fail if MAE or RMSE differ by
+        more than this relative tolerance from the float64 reference metrics
+        recorded by `features.py --reference-test-size` (built from the
+        unrounded float64 features). Ignored for float64 features.
+    out_model:
+        Optional JSON file with the fitted coefficients and intercept, for
+        real-time scoring with feature_online.py.
+
     Notes
     -----
     - Uses a time-ordered split to avoid leakage.
     - Predicts y_next_return (one-step-ahead log return).
     """
-    df = pd.read_csv(features_csv, parse_dates=["date"]).sort_values("date")
-
-    target = "y_next_return"
-    drop_cols = {"date", "value", "log_price", "log_return", target}
-    feature_cols = [c for c in df.columns if c not in drop_cols]
-
-    train, test = timeSplit(df, test_size=test_size)
-
-    X_train = train[feature_cols].to_numpy()
-    y_train = train[target].to_numpy()
-    X_test = test[feature_cols].to_numpy()
-    y_test = test[target].to_numpy()
-
-    model = Ridge(alpha=1.0)
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-
-    mae = float(mean_absolute_error(y_test, y_pred))
-    rmse = float(np.sqrt(mean_squared_error(y_test, y_pred)))
+    dates, X, y, feature_cols = readFeatureMatrix(features_path)
+
+    # Row slices of the (memory-mapped) arrays are views, not copies.
+    n_train = splitIndex(len(y), test_size)
+    X_train, y_train = X[:n_train], y[:n_train]
+    X_test, y_test = X[n_train:], y[n_train:]
+    test_dates = dates[n_train:]
+
+    model, y_pred, mae, rmse = fitRidge(X_train, y_train, X_test, y_test)
+
+    metric_drift = None
+    if max_metric_drift is not None and X.dtype != np.float64:
+        reference = readMeta(features_path).get("float64_reference") if isFeatureStore(features_path) else None
+        if reference is None or reference["test_size"] != test_size or reference["n_rows"] != len(y):
+            raise ValueError(
+                f"{features_path} has no float64 reference metrics for test_size={test_size:g} and {len(y):,} rows; "
+                f"rebuild it with features.py --reference-test-size {test_size:g}"
+            )
+        mae64, rmse64 = reference["mae"], reference["rmse"]
+        metric_drift = max(abs(mae - mae64) / mae64, abs(rmse - rmse64) / rmse64)
+        if metric_drift > max_metric_drift:
+            raise ValueError(
+                f"{X.dtype} features drift the metrics by {metric_drift:.3g} relative to float64 "
+                f"(MAE {mae:.6f} vs {mae64:.6f}, RMSE {rmse:.6f} vs {rmse64:.6f}); "
+                f"tolerance is {max_metric_drift:g}"
+            )
 
     metrics = {
-        "rows_total": int(len(df)),
-        "rows_train": int(len(train)),
-        "rows_test": int(len(test)),
+        "rows_total": int(len(y)),
+        "rows_train": int(len(y_train)),
+        "rows_test": int(len(y_test)),
         "model": "Ridge(alpha=1.0)",
         "mae": mae,
         "rmse": rmse,
-        "test_period_start": str(test["date"].min().date()),
-        "test_period_end": str(test["date"].max().date()),
+        "test_period_start": str(pd.Timestamp(test_dates.min()).date()),
+        "test_period_end": str(pd.Timestamp(test_dates.max()).date()),
         "n_features": int(len(feature_cols)),
         "features_used": feature_cols,
+        "dtype": str(X.dtype),
     }
+    if metric_drift is not None:
+        metrics["metric_drift_vs_float64"] = metric_drift
 
     os.makedirs(os.path.dirname(out_metrics), exist_ok=True)
     with open(out_metrics, "w", encoding="utf-8") as f:
         json.dump(metrics, f, indent=2)
 
     os.makedirs(os.path.dirname(out_preds), exist_ok=True)
-    pred_df = test[["date"]].copy()
-    pred_df["y_true"] = y_test
-    pred_df["y_pred"] = y_pred
+    pred_df = pd.DataFrame({"date": np.asarray(test_dates), "y_true": np.asarray(y_test), "y_pred": np.asarray(y_pred)})
     pred_df.to_csv(out_preds, index=False)
 
+    if out_model:
+        os.makedirs(os.path.dirname(out_model) or ".", exist_ok=True)
+        with open(out_model, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model": "Ridge(alpha=1.0)",
+                    "features_used": feature_cols,
+                    "coef": [float(c) for c in model.coef_],
+                    "intercept": float(model.intercept_),
+                },
+                f,
+                indent=2,
+            )
+        print(f"Wrote model -> {out_model}")
+
     print(f"Wrote metrics -> {out_metrics}")
     print(f"Wrote predictions -> {out_preds}")
     print(f"MAE={mae:.6f} RMSE={rmse:.6f}")
+    if metric_drift is not None:
+        print(f"Metric drift of {X.dtype} features vs float64: {metric_drift:.3g}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--features-csv", required=True)
+    parser.add_argument(
+        "--features",
+        "--features-csv",
+        dest="features",
+        required=True,
+        help="Feature store directory (or a features CSV)",
+    )
     parser.add_argument("--out-metrics", required=True)
     parser.add_argument("--out-preds", required=True)
     parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument(
+        "--max-metric-drift",
+        type=float,
+        help="For float32 features: max relative MAE/RMSE change vs the store's float64 reference metrics",
+    )
+    parser.add_argument("--out-model", help="JSON with the fitted coefficients, for feature_online.py")
     args = parser.parse_args()
 
-    main(args.features_csv, args.out_metrics, args.out_preds, args.test_size)
+    main(
+        args.features,
+        args.out_metrics,
+        args.out_preds,
+        args.test_size,
+        max_metric_drift=args.max_metric_drift,
+        out_model=args.out_model,
+    )
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import feature_store
+import train_eval
+from feature_registry import extraFeatureNames
+from feature_store import readFeatureStore, readMeta
+from features import VERIFY_ATOL, VERIFY_RTOL, appendFeatures, computeFeatures, main, verifyFeatureStore
+from store_sqlite import upsertSeries
+
+SERIES_ID = "TEST"
+TABLE = "observations"
+LAGS = [1, 3]
+WINDOWS = [3, 6]
+
+
+def makeSeries(n: int = 160, seed: int = 0) -> pd.DataFrame:
+    """
+    Monthly prices with missing months, missing values and non-positive values.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-01", periods=n, freq="MS")
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.05, n)))
+    values[[10, 47, 48, 90]] = np.nan
+    values[[20, 75]] = 0.0
+    values[[33, 121]] = -1.0
+    keep = np.ones(n, dtype=bool)
+    keep[[5, 6, 7, 60, 130]] = False
+    return pd.DataFrame({"date": dates[keep], "value": values[keep]})
+
+
+def assertMatchesRebuild(
+    db_path: str, out_path: str, extra: list[str], rtol: float = VERIFY_RTOL, atol: float = VERIFY_ATOL
+) -> None:
+    dates, X, y, feature_cols = readFeatureStore(out_path)
+    full = computeFeatures(db_path, TABLE, SERIES_ID, LAGS, WINDOWS, extra=extra)
+    assert feature_cols == [c for c in full.columns if c.startswith("r_")]
+    np.testing.assert_array_equal(dates, full["date"].to_numpy(dtype="datetime64[ns]"))
+    np.testing.assert_allclose(X, full[feature_cols].to_numpy(), rtol=rtol, atol=atol)
+    np.testing.assert_allclose(y, full["y_next_return"].to_numpy(), rtol=rtol, atol=atol)
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [[], extraFeatureNames(ewm_halflives=[3], moment_windows=[5], minmax_windows=[4], zscore_windows=[6])],
+    ids=["base", "extra"],
+)
+def test_appends_match_full_rebuild(tmp_path, extra):
+    db_path = str(tmp_path / "market.db")
+    out_path = str(tmp_path / "features")
+    series = makeSeries()
+
+    upsertSeries(series.iloc[:60], db_path, TABLE, SERIES_ID)
+    main(db_path, TABLE, out_path, LAGS, WINDOWS, series_id=SERIES_ID, extra=extra)
+
+    n_rows = len(readFeatureStore(out_path)[0])
+    for stop in (61, 62, 80, 100, 133, len(series)):
+        upsertSeries(series.iloc[:stop], db_path, TABLE, SERIES_ID)
+        n_rows += appendFeatures(db_path, TABLE, out_path, SERIES_ID, LAGS, WINDOWS, extra=extra)
+        assertMatchesRebuild(db_path, out_path, extra)
+
+    assert n_rows == len(readFeatureStore(out_path)[0])
+    verifyFeatureStore(db_path, TABLE, out_path, SERIES_ID, LAGS, WINDOWS, extra=extra)
+
+
+def test_append_without_new_observations_is_a_no_op(tmp_path):
+    db_path = str(tmp_path / "market.db")
+    out_path = str(tmp_path / "features")
+    upsertSeries(makeSeries(), db_path, TABLE, SERIES_ID)
+    main(db_path, TABLE, out_path, LAGS, WINDOWS, series_id=SERIES_ID)
+
+    assert appendFeatures(db_path, TABLE, out_path, SERIES_ID, LAGS, WINDOWS) == 0
+    assertMatchesRebuild(db_path, out_path, [])
+
+
+def test_rewrite_fallback_keeps_store_meta(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "market.db")
+    out_path = str(tmp_path / "features")
+    series = makeSeries()
+    upsertSeries(series.iloc[:100], db_path, TABLE, SERIES_ID)
+    main(db_path, TABLE, out_path, LAGS, WINDOWS, series_id=SERIES_ID, dtype="float32", reference_test_size=0.2)
+    reference = readMeta(out_path)["float64_reference"]
+
+    # Force the full-rewrite path instead of the in-place .npy append.
+    monkeypatch.setattr(feature_store, "appendNpy", lambda path, rows, n_rows: False)
+    upsertSeries(series, db_path, TABLE, SERIES_ID)
+    assert appendFeatures(db_path, TABLE, out_path, SERIES_ID, LAGS, WINDOWS) > 0
+
+    meta = readMeta(out_path)
+    assert meta["dtype"] == "float32"
+    assert meta["series_id"] == SERIES_ID
+    assert meta["float64_reference"] == reference
+    assertMatchesRebuild(db_path, out_path, [], rtol=1e-6, atol=1e-6)
+
+    # The carried reference describes fewer rows, so it is refreshed rather than trusted.
+    metrics = [str(tmp_path / "reports" / name) for name in ("metrics.json", "preds.csv")]
+    with pytest.raises(ValueError, match="no float64 reference"):
+        train_eval.main(out_path, *metrics, 0.2, max_metric_drift=1e-3)
+    main(db_path, TABLE, out_path, LAGS, WINDOWS, series_id=SERIES_ID, append=True, reference_test_size=0.2)
+    assert readMeta(out_path)["float64_reference"]["n_rows"] == meta["n_rows"]
+    train_eval.main(out_path, *metrics, 0.2, max_metric_drift=1e-3)
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import computeFeatures
+from store_sqlite import upsertSeries
+
+SERIES_ID = "TEST"
+TABLE = "observations"
+LAGS = [1, 3]
+WINDOWS = [3, 6]
+
+
+@pytest.mark.parametrize("after_end", [[np.nan], [0.0], [-1.0, np.nan, 0.0]], ids=["nan", "zero", "several"])
+def test_range_matches_full_build_when_invalid_rows_follow_end(tmp_path, after_end):
+    db_path = str(tmp_path / "market.db")
+    dates = pd.date_range("2000-01-01", periods=80, freq="MS")
+    values = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.05, len(dates))))
+    end = dates[50]
+    values[51 : 51 + len(after_end)] = after_end
+    values[[30, 31]] = [np.nan, -2.0]  # invalid rows inside the warm-up as well
+    upsertSeries(pd.DataFrame({"date": dates, "value": values}), db_path, TABLE, SERIES_ID)
+
+    start = dates[36]
+    full = computeFeatures(db_path, TABLE, SERIES_ID, LAGS, WINDOWS)
+    expected = full[(full["date"] >= start) & (full["date"] <= end)].reset_index(drop=True)
+    got = computeFeatures(db_path, TABLE, SERIES_ID, LAGS, WINDOWS, start=start, end=end)
+
+    assert got["date"].iloc[-1] == end
+    pd.testing.assert_frame_equal(got, expected, rtol=1e-9, atol=1e-12)
+
+
+def test_range_at_end_of_history_drops_last_row(tmp_path):
+    db_path = str(tmp_path / "market.db")
+    dates = pd.date_range("2000-01-01", periods=40, freq="MS")
+    values = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.05, len(dates))))
+    values[-2:] = [np.nan, 0.0]
+    upsertSeries(pd.DataFrame({"date": dates, "value": values}), db_path, TABLE, SERIES_ID)
+
+    full = computeFeatures(db_path, TABLE, SERIES_ID, LAGS, WINDOWS)
+    got = computeFeatures(db_path, TABLE, SERIES_ID, LAGS, WINDOWS, start=dates[20], end=dates[-1])
+    pd.testing.assert_frame_equal(got, full[full["date"] >= dates[20]].reset_index(drop=True), rtol=1e-9, atol=1e-12)